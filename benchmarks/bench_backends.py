@@ -0,0 +1,39 @@
+"""Compare the extraction times of the extraction backends.
+
+Run with: python -m benchmarks.bench_backends
+
+Times DataExtractor.extract_data on generated statements with each backend.
+tests/test_backends.py checks that the backends extract the same data.
+"""
+
+from typing import List
+
+from benchmarks.generator import generate_statement
+from benchmarks.stubs import install_renderer_fallback
+from benchmarks.timing import time_best
+from pdf_parser.backends import ExtractionBackend, PdfplumberBackend, PyMuPDFBackend
+from pdf_parser.extractors import DataExtractor
+
+BACKENDS: List[ExtractionBackend] = [PdfplumberBackend(), PyMuPDFBackend()]
+
+
+def main() -> None:
+    if install_renderer_fallback():
+        print("poppler is not installed; pdfplumber pages are rendered by PyMuPDF\n")
+
+    print(
+        f"{'pages':>6}" + "".join(f" {backend.name + ' s':>14}" for backend in BACKENDS)
+    )
+    for number_of_pages in (1, 10, 40):
+        pdf_bytes = generate_statement(number_of_pages=number_of_pages)
+        seconds = [
+            time_best(lambda: DataExtractor(pdf_bytes, backend=backend).extract_data())
+            for backend in BACKENDS
+        ]
+        print(
+            f"{number_of_pages:>6}" + "".join(f" {value:>14.3f}" for value in seconds)
+        )
+
+
+if __name__ == "__main__":
+    main()
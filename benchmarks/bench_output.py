@@ -0,0 +1,55 @@
+"""Compare the timings of the direct output writer and pydantic serialization.
+
+Run with: python -m benchmarks.bench_output
+
+Parses generated statements once, then times serializing the same output
+through the Document model and through OutputWriter. tests/test_output.py
+checks that both write the same JSON.
+"""
+
+from typing import Any, Dict
+
+from benchmarks.generator import generate_statement, get_statement_template
+from benchmarks.stubs import install_renderer_fallback
+from benchmarks.timing import time_best
+from pdf_parser.extractors import DataExtractor
+from pdf_parser.output import OutputWriter
+from pdf_parser.parser import Parser
+from pdf_parser.pydantic_models import Document
+from pdf_parser.templates import CompiledTemplate
+
+
+def serialize_with_pydantic(output: Dict[str, Any]) -> str:
+    output_document = Document(**output)
+    if output_document.metadata.metrics is None:
+        return output_document.model_dump_json(exclude={"metadata": {"metrics"}})
+    return output_document.model_dump_json()
+
+
+def main() -> None:
+    install_renderer_fallback()
+
+    print(
+        f"{'pages':>6} {'rows':>7} {'pydantic ms':>12} {'direct ms':>10} {'speedup':>8}"
+    )
+    for number_of_pages in (1, 10, 40):
+        pdf_bytes = generate_statement(number_of_pages, rows_per_page=40)
+        pdf_data = DataExtractor(pdf_bytes).extract_data()
+        parser = Parser()
+        output = parser.get_output(
+            CompiledTemplate.compile(get_statement_template()), pdf_data, []
+        )
+
+        number_of_rows = sum(
+            len(table["data"]) for page in output["pages"] for table in page["tables"]
+        )
+        pydantic_time = time_best(lambda: serialize_with_pydantic(output), repeat=5)
+        direct_time = time_best(lambda: OutputWriter.to_json(output), repeat=5)
+        print(
+            f"{number_of_pages:>6} {number_of_rows:>7} {pydantic_time * 1000:>12.2f}"
+            f" {direct_time * 1000:>10.2f} {pydantic_time / direct_time:>8.1f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,63 @@
+"""Benchmark TableSplitter.average_y_coordinates against the previous algorithm.
+
+Run with: python -m benchmarks.bench_row_clustering
+"""
+
+import random
+from typing import List
+
+from benchmarks.timing import time_best
+from pdf_parser.tables import TableSplitter
+
+
+def average_y_coordinates_quadratic(y_coordinates: List[float]) -> List[float]:
+    """The previous implementation, kept as the reference for timings."""
+    threshold = 0.01
+    averaged_y_coordinates = []
+    while y_coordinates:
+        current_value = y_coordinates.pop(0)
+        close_values = [current_value]
+        for value in y_coordinates:
+            if abs(value - current_value) < threshold:
+                close_values.append(value)
+                y_coordinates.remove(value)
+        averaged_y_coordinates.append(sum(close_values) / len(close_values))
+    return averaged_y_coordinates
+
+
+def get_word_tops(number_of_words: int, seed: int = 0) -> List[float]:
+    """Word tops of a dense page: rows of several words with slightly jittered tops."""
+    generator = random.Random(seed)
+    words_per_row = 6
+    number_of_rows = max(number_of_words // words_per_row, 1)
+    row_height = 0.9 / number_of_rows
+    return sorted(
+        {
+            round(0.05 + row * row_height + generator.uniform(0, row_height / 4), 6)
+            for row in range(number_of_rows)
+            for _ in range(words_per_row)
+        }
+    )
+
+
+def main() -> None:
+    table_splitter = TableSplitter({})
+    print(
+        f"{'words':>8} {'tops':>8} {'quadratic ms':>14} {'sweep ms':>10} {'speedup':>8}"
+    )
+    for number_of_words in (100, 1000, 5000, 10000, 20000):
+        word_tops = get_word_tops(number_of_words)
+        quadratic_time = time_best(
+            lambda: average_y_coordinates_quadratic(list(word_tops)), repeat=5
+        )
+        sweep_time = time_best(
+            lambda: table_splitter.average_y_coordinates(word_tops, 0.01), repeat=5
+        )
+        print(
+            f"{number_of_words:>8} {len(word_tops):>8} {quadratic_time * 1000:>14.2f}"
+            f" {sweep_time * 1000:>10.2f} {quadratic_time / sweep_time:>8.1f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,206 @@
+"""Synthetic bank statements and matching templates for the benchmarks.
+
+Statements are written with PyMuPDF (in requirements_dev.txt) and are
+deterministic for a given seed. Scanned statements hold one rendered image
+per page and no text layer, like the output of a document scanner.
+"""
+
+import random
+from typing import Any, Dict, List, Tuple
+
+import pymupdf  # type: ignore
+
+PAGE_WIDTH = 595
+PAGE_HEIGHT = 842
+FIRST_ROW_Y = 130
+ROW_HEIGHT = 17
+LAST_ROW_Y = 800
+
+DESCRIPTION_WORDS = [
+    "CARD",
+    "PAYMENT",
+    "TO",
+    "TESCO",
+    "STORES",
+    "DD",
+    "SALARY",
+    "TRANSFER",
+    "REF",
+    "ATM",
+    "AMAZON",
+    "COUNCIL",
+    "TAX",
+]
+
+# (field name, left x, right x) of the table columns, as fractions of the width
+COLUMNS: List[Tuple[str, float, float]] = [
+    ("date", 0.07, 0.115),
+    ("description", 0.19, 0.6),
+    ("paid_out", 0.62, 0.74),
+    ("paid_in", 0.74, 0.86),
+    ("balance", 0.86, 0.99),
+]
+
+
+def get_max_rows_per_page() -> int:
+    return (LAST_ROW_Y - FIRST_ROW_Y) // ROW_HEIGHT + 1
+
+
+def draw_statement_page(
+    page: Any,
+    page_index: int,
+    rows_per_page: int,
+    ruled: bool,
+    generator: random.Random,
+) -> None:
+    page.insert_text((50, 50), "Example Bank plc", fontsize=14)
+    page.insert_text(
+        (400, 50), f"Statement date {page_index % 28 + 1:02d}/03/2024", fontsize=9
+    )
+    page.insert_text((50, 80), "Account number 12345678 Sort code 20-00-00", fontsize=9)
+    for text, x in (
+        ("Date", 50),
+        ("Description", 120),
+        ("Paid out", 380),
+        ("Paid in", 450),
+        ("Balance", 520),
+    ):
+        page.insert_text((x, 110), text, fontsize=9)
+
+    y = FIRST_ROW_Y
+    for row in range(min(rows_per_page, get_max_rows_per_page())):
+        page.insert_text((50, y), f"{row % 28 + 1:02d} Mar", fontsize=8)
+        description = " ".join(
+            generator.choice(DESCRIPTION_WORDS) for _ in range(generator.randint(1, 4))
+        )
+        page.insert_text((120, y), description, fontsize=8)
+        if generator.random() < 0.3:
+            # A wrapped description line without a date
+            page.insert_text(
+                (120, y + 8), f"REF {generator.randint(100, 999)}", fontsize=7
+            )
+        amount = f"{generator.randint(1, 999)}.{generator.randint(0, 99):02d}"
+        page.insert_text(
+            (380 if generator.random() < 0.5 else 450, y), amount, fontsize=8
+        )
+        balance = f"{generator.randint(100, 9999)}.{generator.randint(0, 99):02d}"
+        page.insert_text((520, y), balance, fontsize=8)
+        if ruled:
+            # Every third line is light grey, so max_pixel_value filtering matters
+            color = (0.85, 0.85, 0.85) if row % 3 == 0 else (0, 0, 0)
+            page.draw_line((45, y + 11), (570, y + 11), color=color, width=0.5)
+        y += ROW_HEIGHT
+
+    if ruled:
+        page.draw_line((45, 115), (45, LAST_ROW_Y), color=(0, 0, 0), width=0.5)
+
+
+def generate_statement(
+    number_of_pages: int = 3,
+    rows_per_page: int = 40,
+    ruled: bool = True,
+    scanned: bool = False,
+    seed: int = 0,
+    dpi: int = 150,
+) -> bytes:
+    """Generate a statement PDF.
+
+    Rows per page are capped by the page height. A scanned statement is
+    rendered at the given dpi and stored as one image per page.
+    """
+    generator = random.Random(seed)
+    document = pymupdf.open()
+    for page_index in range(number_of_pages):
+        page = document.new_page(width=PAGE_WIDTH, height=PAGE_HEIGHT)
+        draw_statement_page(page, page_index, rows_per_page, ruled, generator)
+
+    if not scanned:
+        return document.tobytes()
+
+    scanned_document = pymupdf.open()
+    for page in document:
+        pixmap = page.get_pixmap(dpi=dpi)
+        scanned_page = scanned_document.new_page(width=PAGE_WIDTH, height=PAGE_HEIGHT)
+        scanned_page.insert_image(scanned_page.rect, pixmap=pixmap)
+    return scanned_document.tobytes()
+
+
+def get_statement_template(
+    row_delimiter_type: str = "line",
+    extraction_method: str = "extraction",
+    forms: bool = True,
+    tables: bool = True,
+) -> Dict[str, Any]:
+    """Template for the generated statements."""
+    rules: List[Dict[str, Any]] = []
+    pages: List[Dict[str, Any]] = []
+    if forms:
+        rules.extend(
+            [
+                {
+                    "rule_id": "bank_name",
+                    "type": "form",
+                    "config": {
+                        "field_name": "bank_name",
+                        "search_type": "coordinates",
+                        "coordinates": {
+                            "top_left": {"x": 0.07, "y": 0.04},
+                            "bottom_right": {"x": 0.4, "y": 0.065},
+                        },
+                    },
+                },
+                {
+                    "rule_id": "account_number",
+                    "type": "form",
+                    "config": {
+                        "field_name": "account_number",
+                        "search_type": "regex",
+                        "regex": r"Account number (\d+)",
+                    },
+                },
+                {
+                    "rule_id": "statement_date",
+                    "type": "form",
+                    "config": {
+                        "field_name": "statement_date",
+                        "search_type": "regex",
+                        "regex": r"\d\d/\d\d/\d{4}",
+                    },
+                },
+            ]
+        )
+        pages.append({"page_numbers": "1", "forms": ["bank_name", "account_number"]})
+        pages.append({"page_numbers": "1:-1", "forms": ["statement_date"]})
+
+    if tables:
+        rules.append(
+            {
+                "rule_id": "transactions",
+                "type": "table",
+                "config": {
+                    "columns": [
+                        {
+                            "field_name": field_name,
+                            "coordinates": {
+                                "top_left": {"x": left_x, "y": 0.14},
+                                "bottom_right": {"x": right_x, "y": 0.96},
+                            },
+                        }
+                        for field_name, left_x, right_x in COLUMNS
+                    ],
+                    "row_delimiter": {
+                        "type": row_delimiter_type,
+                        "field_name": "date",
+                        "max_pixel_value": 100,
+                    },
+                },
+            }
+        )
+        pages.append({"page_numbers": "1:-1", "tables": ["transactions"]})
+
+    return {
+        "metadata": {"template_name": "synthetic_statement", "version": "1"},
+        "extraction_method": extraction_method,
+        "rules": rules,
+        "pages": pages,
+    }
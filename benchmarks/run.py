@@ -0,0 +1,237 @@
+"""Run the benchmark suite and report how each stage scales with page count.
+
+Run with: python -m benchmarks.run [--quick] [--only NAME] [--json PATH]
+
+Every case runs in a fresh process, so its peak RSS is measured on its own;
+for parse cases it includes extracting the document first.
+Tesseract is always stubbed, and poppler too when it is not installed, so
+the suite runs offline.
+"""
+
+import argparse
+import json
+import math
+import multiprocessing
+import resource
+import sys
+from typing import Any, Dict, List, Sequence
+
+from benchmarks.generator import generate_statement, get_statement_template
+from benchmarks.timing import time_best
+
+PAGE_COUNTS = [1, 5, 10, 20, 40]
+QUICK_PAGE_COUNTS = [1, 5, 10]
+OCR_PAGE_COUNTS = [1, 2, 4, 8]
+QUICK_OCR_PAGE_COUNTS = [1, 2]
+
+
+def get_peak_rss_mb() -> float:
+    # ru_maxrss is in kilobytes on Linux and in bytes on macOS
+    peak_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak_rss / 1024**2 if sys.platform == "darwin" else peak_rss / 1024
+
+
+def generate_case_statement(case: Dict[str, Any]) -> bytes:
+    return generate_statement(
+        number_of_pages=case["pages"],
+        rows_per_page=case["rows_per_page"],
+        ruled=case["ruled"],
+        scanned=case["scanned"],
+    )
+
+
+def run_case(case: Dict[str, Any], pdf_bytes: bytes) -> Dict[str, Any]:
+    """Run one benchmark case; called in a fresh worker process."""
+    from benchmarks.stubs import install_renderer_fallback, install_tesseract_stub
+
+    install_tesseract_stub(case.get("ocr_latency", 0.0))
+    install_renderer_fallback()
+
+    from pdf_parser.extraction_plan import ExtractionPlan
+    from pdf_parser.extractors import DataExtractor
+    from pdf_parser.parser import Parser
+
+    repeat = case["repeat"]
+
+    if case["stage"] == "extract":
+        plan = (
+            ExtractionPlan.from_template(get_statement_template(**case["plan"]))
+            if "plan" in case
+            else None
+        )
+
+        def extract() -> None:
+            DataExtractor(
+                pdf_bytes, columnar=case["columnar"], plan=plan
+            ).extract_data()
+
+        seconds = time_best(extract, repeat)
+    else:
+        data_extractor = DataExtractor(pdf_bytes, columnar=case["columnar"])
+        pdf_data = data_extractor.extract_data()
+        template = get_statement_template(**case["template"])
+
+        def parse() -> None:
+            Parser.parse_pdf(
+                template,
+                pdf_data,
+                data_extractor.page_images,
+                ocr_mode=case.get("ocr_mode", "cell"),
+            )
+
+        seconds = time_best(parse, repeat)
+
+    return {**case, "seconds": seconds, "peak_rss_mb": get_peak_rss_mb()}
+
+
+def get_cases(quick: bool, repeat: int, ocr_latency: float) -> List[Dict[str, Any]]:
+    page_counts = QUICK_PAGE_COUNTS if quick else PAGE_COUNTS
+    ocr_page_counts = QUICK_OCR_PAGE_COUNTS if quick else OCR_PAGE_COUNTS
+    base_case = {
+        "rows_per_page": 40,
+        "ruled": True,
+        "scanned": False,
+        "columnar": False,
+        "repeat": repeat,
+    }
+
+    benchmarks: Dict[str, List[Dict[str, Any]]] = {
+        "extract_ruled": [
+            {"stage": "extract", "pages": pages} for pages in page_counts
+        ],
+        "extract_unruled": [
+            {"stage": "extract", "pages": pages, "ruled": False}
+            for pages in page_counts
+        ],
+        "extract_ruled_columnar": [
+            {"stage": "extract", "pages": pages, "columnar": True}
+            for pages in page_counts
+        ],
+        "extract_planned_forms": [
+            {"stage": "extract", "pages": pages, "plan": {"tables": False}}
+            for pages in page_counts
+        ],
+        "parse_forms": [
+            {
+                "stage": "parse",
+                "pages": pages,
+                "template": {"tables": False},
+            }
+            for pages in page_counts
+        ],
+        "parse_table_line": [
+            {
+                "stage": "parse",
+                "pages": pages,
+                "template": {"row_delimiter_type": "line", "forms": False},
+            }
+            for pages in page_counts
+        ],
+        "parse_table_field": [
+            {
+                "stage": "parse",
+                "pages": pages,
+                "ruled": False,
+                "template": {"row_delimiter_type": "field", "forms": False},
+            }
+            for pages in page_counts
+        ],
+    }
+    for ocr_mode in ("cell", "page"):
+        benchmarks[f"parse_ocr_{ocr_mode}"] = [
+            {
+                "stage": "parse",
+                "pages": pages,
+                "scanned": True,
+                "ocr_mode": ocr_mode,
+                "ocr_latency": ocr_latency,
+                "template": {"extraction_method": "ocr"},
+            }
+            for pages in ocr_page_counts
+        ]
+
+    return [
+        {**base_case, **case, "benchmark": name}
+        for name, cases in benchmarks.items()
+        for case in cases
+    ]
+
+
+def get_scaling_exponent(pages: Sequence[int], seconds: Sequence[float]) -> float:
+    """Least squares slope of log(seconds) against log(pages); 1 is linear."""
+    points = [
+        (math.log(page_count), math.log(time_taken))
+        for page_count, time_taken in zip(pages, seconds)
+        if time_taken > 0
+    ]
+    if len(points) < 2:
+        return float("nan")
+    mean_x = sum(x for x, _ in points) / len(points)
+    mean_y = sum(y for _, y in points) / len(points)
+    variance = sum((x - mean_x) ** 2 for x, _ in points)
+    if variance == 0:
+        return float("nan")
+    return sum((x - mean_x) * (y - mean_y) for x, y in points) / variance
+
+
+def print_report(results: List[Dict[str, Any]]) -> None:
+    benchmark_names = list(dict.fromkeys(result["benchmark"] for result in results))
+    for name in benchmark_names:
+        series = [result for result in results if result["benchmark"] == name]
+        exponent = get_scaling_exponent(
+            [result["pages"] for result in series],
+            [result["seconds"] for result in series],
+        )
+        print(f"\n{name} (scaling exponent {exponent:.2f})")
+        print(f"{'pages':>6} {'seconds':>9} {'ms/page':>9} {'peak RSS MB':>12}")
+        for result in series:
+            print(
+                f"{result['pages']:>6} {result['seconds']:>9.3f}"
+                f" {result['seconds'] * 1000 / result['pages']:>9.1f}"
+                f" {result['peak_rss_mb']:>12.1f}"
+            )
+
+
+def main() -> None:
+    argument_parser = argparse.ArgumentParser(description=__doc__)
+    argument_parser.add_argument(
+        "--quick", action="store_true", help="Run fewer, smaller cases"
+    )
+    argument_parser.add_argument(
+        "--only", action="append", help="Run only benchmarks whose name contains this"
+    )
+    argument_parser.add_argument("--repeat", type=int, default=3)
+    argument_parser.add_argument(
+        "--ocr-latency",
+        type=float,
+        default=0.0,
+        help="Seconds each stubbed tesseract call takes",
+    )
+    argument_parser.add_argument("--json", help="Also write the results to this file")
+    arguments = argument_parser.parse_args()
+
+    cases = get_cases(arguments.quick, arguments.repeat, arguments.ocr_latency)
+    if arguments.only:
+        cases = [
+            case
+            for case in cases
+            if any(only in case["benchmark"] for only in arguments.only)
+        ]
+
+    # One fresh process per case keeps peak RSS measurements independent.
+    # Statements are generated here so generating them is not measured.
+    context = multiprocessing.get_context("spawn")
+    results = []
+    for case in cases:
+        pdf_bytes = generate_case_statement(case)
+        with context.Pool(1) as pool:
+            results.append(pool.apply(run_case, (case, pdf_bytes)))
+
+    print_report(results)
+    if arguments.json:
+        with open(arguments.json, "w") as json_file:
+            json.dump(results, json_file, indent=2)
+
+
+if __name__ == "__main__":
+    main()
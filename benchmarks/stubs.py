@@ -0,0 +1,91 @@
+"""Offline stand-ins for tesseract and, where it is missing, poppler.
+
+The benchmarks measure this package, not tesseract, so OCR calls are
+replaced by a stub that returns deterministic text after a fixed delay.
+When poppler's pdftoppm is not installed, pdf2image is pointed at a PyMuPDF
+renderer so the rendering paths can still be exercised.
+"""
+
+import shutil
+import time
+from typing import Any, Dict, List, Optional
+
+import pytesseract  # type: ignore
+from PIL import Image
+
+
+def install_tesseract_stub(latency: float = 0.0) -> None:
+    """Replace pytesseract's image_to_string and image_to_data."""
+
+    def image_to_string(image: Any, config: str = "", **kwargs: Any) -> str:
+        if latency:
+            time.sleep(latency)
+        width, height = image.size
+        return f"text {width}x{height}\n"
+
+    def image_to_data(
+        image: Any, config: str = "", output_type: Optional[str] = None, **kwargs: Any
+    ) -> Dict[str, List[Any]]:
+        if latency:
+            time.sleep(latency)
+        width, height = image.size
+        data: Dict[str, List[Any]] = {
+            "left": [],
+            "top": [],
+            "width": [],
+            "height": [],
+            "text": [],
+        }
+        # A word every 120 x 40 pixels
+        for top in range(0, height - 20, 40):
+            for left in range(0, width - 20, 120):
+                data["left"].append(left)
+                data["top"].append(top)
+                data["width"].append(80)
+                data["height"].append(20)
+                data["text"].append(f"word{top}_{left}")
+        return data
+
+    pytesseract.image_to_string = image_to_string
+    pytesseract.image_to_data = image_to_data
+
+
+def install_renderer_fallback() -> bool:
+    """Render with PyMuPDF if poppler is missing. Returns True if installed."""
+    if shutil.which("pdftoppm") is not None:
+        return False
+
+    import pdf2image
+    import pdf2image.pdf2image
+    import pymupdf  # type: ignore
+
+    def convert_from_bytes(
+        pdf_file: bytes,
+        dpi: int = 200,
+        first_page: Optional[int] = None,
+        last_page: Optional[int] = None,
+        **kwargs: Any,
+    ) -> List[Image.Image]:
+        document = pymupdf.open(stream=pdf_file, filetype="pdf")
+        first_page_index = (first_page or 1) - 1
+        last_page_number = min(last_page or document.page_count, document.page_count)
+        images = []
+        for page_index in range(first_page_index, last_page_number):
+            pixmap = document[page_index].get_pixmap(dpi=dpi)
+            images.append(
+                Image.frombytes("RGB", (pixmap.width, pixmap.height), pixmap.samples)
+            )
+        return images
+
+    def pdfinfo_from_bytes(pdf_file: bytes, **kwargs: Any) -> Dict[str, Any]:
+        return {"Pages": pymupdf.open(stream=pdf_file, filetype="pdf").page_count}
+
+    for module in (pdf2image, pdf2image.pdf2image):
+        module.convert_from_bytes = convert_from_bytes  # type: ignore
+        module.pdfinfo_from_bytes = pdfinfo_from_bytes  # type: ignore
+
+    # Modules that imported the functions directly
+    import pdf_parser.backends
+
+    pdf_parser.backends.convert_from_bytes = convert_from_bytes  # type: ignore
+    return True
@@ -0,0 +1,12 @@
+import time
+from typing import Any, Callable
+
+
+def time_best(function: Callable[[], Any], repeat: int = 3) -> float:
+    """Run a function repeat times and return its fastest time in seconds."""
+    best_time = float("inf")
+    for _ in range(repeat):
+        start_time = time.perf_counter()
+        function()
+        best_time = min(best_time, time.perf_counter() - start_time)
+    return best_time
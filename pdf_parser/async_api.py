@@ -0,0 +1,353 @@
+import asyncio
+import functools
+import io
+import shlex
+import threading
+import weakref
+from concurrent.futures import Executor
+from typing import (
+    Any,
+    Callable,
+    Dict,
+    List,
+    Optional,
+    Sequence,
+    Set,
+    Tuple,
+    TypeVar,
+    Union,
+)
+
+import pytesseract  # type: ignore
+from PIL import Image
+
+from pdf_parser.cache import OCRCache
+from pdf_parser.extractors import DataExtractor, ImageExtractor, PageImageProvider
+from pdf_parser.ocr import ImageHasher
+from pdf_parser.page_data import PageRaster
+from pdf_parser.parser import Parser
+from pdf_parser.templates import CompiledTemplate
+
+T = TypeVar("T")
+
+OCRRequest = Tuple[str, Tuple[int, int, int, int], str]
+# The document and OCR process semaphores of an event loop
+Semaphores = Tuple[asyncio.Semaphore, asyncio.Semaphore]
+
+
+class RecordingOCRCache(OCRCache):
+    """OCR cache that records the crops it misses instead of letting them run.
+
+    A miss returns an empty string, so a parse with this cache makes no
+    tesseract calls and leaves the list of crops it needs in `requests`.
+    Which crops a document needs never depends on the OCR text itself.
+    """
+
+    def __init__(self, ocr_results: Optional[Dict[str, str]] = None) -> None:
+        super().__init__()
+        self.ocr_results = ocr_results or {}
+        self.requests: Dict[OCRRequest, None] = {}
+
+    def get(
+        self, image_digest: str, crop_box: Tuple[int, int, int, int], config: str = ""
+    ) -> Optional[str]:
+        key = self.get_key(image_digest, crop_box, config)
+        if key in self.ocr_results:
+            return self.ocr_results[key]
+        with self.lock:
+            self.requests[(image_digest, crop_box, config)] = None
+        return ""
+
+
+def extract_document(
+    pdf_bytes: bytes, extractor_options: Dict[str, Any]
+) -> Tuple[Dict[str, Any], Sequence[bytes]]:
+    """Extract a document, returning its data and page images."""
+    data_extractor = DataExtractor(pdf_bytes, **extractor_options)
+    pdf_data = data_extractor.extract_data()
+    return pdf_data, data_extractor.get_page_images()
+
+
+def pin_page_images(page_images: PageImageProvider) -> PageImageProvider:
+    """Render every page of a provider, returning it with the pages kept."""
+    page_images.pin_pages()
+    return page_images
+
+
+def record_ocr_requests(
+    template: Dict[str, Any],
+    pdf_data: Dict[str, Any],
+    jpg_bytes: Sequence[bytes],
+    ocr_results: Dict[str, str],
+) -> List[OCRRequest]:
+    """Find the OCR crops a parse needs that are not in ocr_results."""
+    recording_cache = RecordingOCRCache(ocr_results)
+    Parser.parse_pdf(template, pdf_data, jpg_bytes, ocr_cache=recording_cache)
+    return list(recording_cache.requests)
+
+
+def parse_with_ocr_results(
+    template: Dict[str, Any],
+    pdf_data: Dict[str, Any],
+    jpg_bytes: Sequence[bytes],
+    ocr_results: Dict[str, str],
+) -> str:
+    """Parse a document with its OCR crops already recognised."""
+    ocr_cache = RecordingOCRCache(ocr_results)
+    output = Parser.parse_pdf(template, pdf_data, jpg_bytes, ocr_cache=ocr_cache)
+    if ocr_cache.requests:
+        raise RuntimeError("OCR results are missing for some crops")
+    return output
+
+
+class AsyncParser:
+    """Asyncio front end for DataExtractor and Parser.parse_pdf.
+
+    Extraction and rule evaluation run on an executor (the event loop's
+    default thread pool unless one is given, which may also be a process
+    pool), so the event loop is never blocked. At most max_concurrency
+    documents are processed at once; further calls wait for a slot.
+
+    In cell OCR mode the crops a document needs are recorded first, then
+    recognised by tesseract subprocesses run with asyncio, at most
+    max_ocr_processes at a time, and finally the document is parsed with
+    those results. Page OCR mode runs pytesseract on the executor.
+
+    asyncio semaphores belong to one event loop, so the limits are created
+    for each loop the parser is used from, e.g. a test client's loop
+    alongside the server's.
+    """
+
+    def __init__(
+        self,
+        max_concurrency: int = 4,
+        max_ocr_processes: int = 4,
+        executor: Optional[Executor] = None,
+        ocr_cache: Optional[OCRCache] = None,
+    ) -> None:
+        """
+        Args:
+            max_concurrency: Documents processed at once per event loop.
+            max_ocr_processes: tesseract subprocesses run at once per event
+                loop. Both limits apply to each event loop separately, so a
+                parser used from two loops can run twice as many documents
+                and tesseract processes; the process as a whole is only
+                bounded by the executor's workers.
+            executor: Runs extraction and rule evaluation. Defaults to the
+                event loop's thread pool; may be a process pool.
+            ocr_cache: Reuses the OCR results of crops seen before, in both
+                OCR modes.
+        """
+        self.max_concurrency = max_concurrency
+        self.max_ocr_processes = max_ocr_processes
+        self.executor = executor
+        self.ocr_cache = ocr_cache
+        self.semaphores: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, Semaphores]"
+        self.semaphores = weakref.WeakKeyDictionary()
+        self.semaphores_lock = threading.Lock()
+
+    def get_semaphores(self) -> Semaphores:
+        loop = asyncio.get_running_loop()
+        with self.semaphores_lock:
+            if loop not in self.semaphores:
+                self.semaphores[loop] = (
+                    asyncio.Semaphore(self.max_concurrency),
+                    asyncio.Semaphore(self.max_ocr_processes),
+                )
+            return self.semaphores[loop]
+
+    @property
+    def document_semaphore(self) -> asyncio.Semaphore:
+        """The document concurrency limit of the running event loop."""
+        return self.get_semaphores()[0]
+
+    @property
+    def ocr_semaphore(self) -> asyncio.Semaphore:
+        """The tesseract process limit of the running event loop."""
+        return self.get_semaphores()[1]
+
+    async def run_in_executor(self, function: Callable[..., T], *args: Any) -> T:
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(
+            self.executor, functools.partial(function, *args)
+        )
+
+    async def extract_data(
+        self, pdf_bytes: bytes, **extractor_options: Any
+    ) -> Tuple[Dict[str, Any], Sequence[bytes]]:
+        """Extract a document, returning its data and page images.
+
+        The keyword arguments are passed to DataExtractor.
+        """
+        async with self.document_semaphore:
+            return await self.run_in_executor(
+                extract_document, pdf_bytes, extractor_options
+            )
+
+    async def parse_pdf(
+        self,
+        template: Union[Dict[str, Any], CompiledTemplate],
+        pdf_data: Dict[str, Any],
+        jpg_bytes: Sequence[bytes],
+        ocr_mode: str = "cell",
+    ) -> str:
+        async with self.document_semaphore:
+            return await self.parse_document(template, pdf_data, jpg_bytes, ocr_mode)
+
+    async def parse(
+        self,
+        template: Union[Dict[str, Any], CompiledTemplate],
+        pdf_bytes: bytes,
+        ocr_mode: str = "cell",
+        **extractor_options: Any,
+    ) -> str:
+        """Extract and parse a document, holding one concurrency slot throughout."""
+        async with self.document_semaphore:
+            pdf_data, jpg_bytes = await self.run_in_executor(
+                extract_document, pdf_bytes, extractor_options
+            )
+            return await self.parse_document(template, pdf_data, jpg_bytes, ocr_mode)
+
+    async def parse_document(
+        self,
+        template: Union[Dict[str, Any], CompiledTemplate],
+        pdf_data: Dict[str, Any],
+        jpg_bytes: Sequence[bytes],
+        ocr_mode: str,
+    ) -> str:
+        # Plain dictionaries are cheaper to send to a process pool
+        raw_template = (
+            template.template if isinstance(template, CompiledTemplate) else template
+        )
+        if raw_template.get("extraction_method") != "ocr" or ocr_mode != "cell":
+            return await self.run_in_executor(
+                functools.partial(
+                    Parser.parse_pdf, ocr_mode=ocr_mode, ocr_cache=self.ocr_cache
+                ),
+                raw_template,
+                pdf_data,
+                jpg_bytes,
+            )
+
+        # All three passes below read the page images, so lazily rendered
+        # pages are rendered once here rather than by each pass or, with a
+        # process pool, by each worker process. Raster providers are read as
+        # pixel buffers, not JPEG bytes, and are left as they are.
+        if isinstance(jpg_bytes, PageImageProvider) and not jpg_bytes.raster:
+            jpg_bytes = await self.run_in_executor(pin_page_images, jpg_bytes)
+
+        ocr_results: Dict[str, str] = {}
+        requests = await self.run_in_executor(
+            record_ocr_requests, raw_template, pdf_data, jpg_bytes, ocr_results
+        )
+        await self.run_ocr_requests(requests, jpg_bytes, ocr_results)
+        return await self.run_in_executor(
+            parse_with_ocr_results, raw_template, pdf_data, jpg_bytes, ocr_results
+        )
+
+    async def run_ocr_requests(
+        self,
+        requests: List[OCRRequest],
+        jpg_bytes: Sequence[bytes],
+        ocr_results: Dict[str, str],
+    ) -> None:
+        """Recognise the requested crops, from the OCR cache or with tesseract."""
+        if not requests:
+            return
+
+        # Decoding and hashing pages is CPU work, but the images are needed in
+        # this process, so it runs on the default thread pool
+        page_images = await asyncio.get_running_loop().run_in_executor(
+            None,
+            self.get_page_images_by_digest,
+            jpg_bytes,
+            {image_digest for image_digest, _, _ in requests},
+        )
+
+        async def run_request(request: OCRRequest) -> None:
+            image_digest, crop_box, config = request
+            key = OCRCache.get_key(image_digest, crop_box, config)
+            text = (
+                self.ocr_cache.get(image_digest, crop_box, config)
+                if self.ocr_cache is not None
+                else None
+            )
+            if text is None:
+                text = await self.image_to_string(
+                    page_images[image_digest], crop_box, config
+                )
+                if self.ocr_cache is not None:
+                    self.ocr_cache.set(image_digest, crop_box, text, config)
+            ocr_results[key] = text
+
+        tasks = [asyncio.ensure_future(run_request(request)) for request in requests]
+        try:
+            await asyncio.gather(*tasks)
+        except BaseException:
+            for task in tasks:
+                task.cancel()
+            raise
+
+    @staticmethod
+    def get_page_images_by_digest(
+        jpg_bytes: Sequence[bytes], image_digests: Set[str]
+    ) -> Dict[str, Union[bytes, Image.Image, PageRaster]]:
+        """Find the page images with the given digests."""
+        image_hasher = ImageHasher()
+        page_images: Dict[str, Union[bytes, Image.Image, PageRaster]] = {}
+        for page_index in range(len(jpg_bytes)):
+            if len(page_images) == len(image_digests):
+                break
+            page_image = ImageExtractor.get_page_image(jpg_bytes, page_index)
+            image_digest = image_hasher.get_digest(page_image)
+            if image_digest in image_digests:
+                page_images[image_digest] = page_image
+        return page_images
+
+    async def image_to_string(
+        self,
+        page_image: Union[bytes, Image.Image, PageRaster],
+        crop_box: Tuple[int, int, int, int],
+        config: str = "",
+    ) -> str:
+        """Run tesseract on a crop of a page image in an asyncio subprocess."""
+        if isinstance(page_image, PageRaster):
+            cropped_image = Image.fromarray(page_image.crop(crop_box))
+        else:
+            image = ImageExtractor(page_image).get_image()
+            cropped_image = image.crop(crop_box)
+        png_bytes = io.BytesIO()
+        cropped_image.save(png_bytes, format="PNG")
+
+        async with self.ocr_semaphore:
+            process = await asyncio.create_subprocess_exec(
+                pytesseract.pytesseract.tesseract_cmd,
+                "stdin",
+                "stdout",
+                *shlex.split(config),
+                stdin=asyncio.subprocess.PIPE,
+                stdout=asyncio.subprocess.PIPE,
+                stderr=asyncio.subprocess.PIPE,
+            )
+            try:
+                stdout, stderr = await process.communicate(png_bytes.getvalue())
+            except asyncio.CancelledError:
+                process.kill()
+                raise
+
+        if process.returncode != 0:
+            raise pytesseract.TesseractError(
+                process.returncode, stderr.decode("utf-8", errors="replace")
+            )
+        return stdout.decode("utf-8").strip()
+
+
+default_async_parser: Optional[AsyncParser] = None
+
+
+def get_async_parser() -> AsyncParser:
+    """Get the process-wide AsyncParser, so every caller shares its limits."""
+    global default_async_parser
+    if default_async_parser is None:
+        default_async_parser = AsyncParser()
+    return default_async_parser
@@ -0,0 +1,178 @@
+import io
+from abc import ABC, abstractmethod
+from typing import Any, ContextManager, Dict, List, Optional, Sequence, Tuple
+
+import pdfplumber
+from pdf2image import convert_from_bytes
+from PIL import Image
+
+
+class ExtractionBackend(ABC):
+    """Reads the pages, words, line segments and page images of a PDF.
+
+    DataExtractor and PageImageProvider read PDFs only through a backend.
+    Words are dictionaries with the "text", "x0", "top", "x1" and "bottom"
+    keys of pdfplumber words, in points from the top left of the page, in
+    reading order. Lines have the "x0", "y0", "x1" and "y1" keys of
+    pdfplumber lines, in points with y measured from the bottom of the page.
+    A backend that does not implement every abstract method cannot be
+    created.
+    """
+
+    name = ""
+
+    @abstractmethod
+    def open(self, pdf_bytes: bytes) -> ContextManager[Any]:
+        """Open a PDF as a document to pass to get_pages."""
+        raise NotImplementedError
+
+    @abstractmethod
+    def get_pages(self, document: Any) -> Sequence[Any]:
+        raise NotImplementedError
+
+    @abstractmethod
+    def get_page_size(self, page: Any) -> Tuple[float, float]:
+        """Get the width and height of a page in points."""
+        raise NotImplementedError
+
+    @abstractmethod
+    def get_words(self, page: Any) -> List[Dict[str, Any]]:
+        raise NotImplementedError
+
+    @abstractmethod
+    def get_lines(self, page: Any) -> List[Dict[str, Any]]:
+        raise NotImplementedError
+
+    def release_page(self, page: Any) -> None:
+        """Drop what the backend cached while reading a page."""
+
+    def get_number_of_pages(self, pdf_bytes: bytes) -> int:
+        with self.open(pdf_bytes) as document:
+            return len(self.get_pages(document))
+
+    @abstractmethod
+    def render_pages(
+        self, pdf_bytes: bytes, first_page: int, last_page: int, dpi: int = 200
+    ) -> List[Image.Image]:
+        """Render pages first_page to last_page, numbered from 1, as RGB images."""
+        raise NotImplementedError
+
+
+class PdfplumberBackend(ExtractionBackend):
+    """pdfplumber for words and lines, and poppler through pdf2image for images."""
+
+    name = "pdfplumber"
+
+    def open(self, pdf_bytes: bytes) -> ContextManager[Any]:
+        return pdfplumber.open(io.BytesIO(pdf_bytes))
+
+    def get_pages(self, document: Any) -> Sequence[Any]:
+        return document.pages
+
+    def get_page_size(self, page: Any) -> Tuple[float, float]:
+        return page.width, page.height
+
+    def get_words(self, page: Any) -> List[Dict[str, Any]]:
+        return page.extract_words()
+
+    def get_lines(self, page: Any) -> List[Dict[str, Any]]:
+        return page.lines
+
+    def release_page(self, page: Any) -> None:
+        page.close()
+
+    def render_pages(
+        self, pdf_bytes: bytes, first_page: int, last_page: int, dpi: int = 200
+    ) -> List[Image.Image]:
+        return convert_from_bytes(
+            pdf_bytes, dpi=dpi, first_page=first_page, last_page=last_page
+        )
+
+
+class PyMuPDFBackend(ExtractionBackend):
+    """PyMuPDF for words, lines and images, all in this process.
+
+    Avoids pdfminer's layout analysis and poppler subprocesses. Words are
+    grouped into lines within y_tolerance points of each other and sorted
+    by x, like pdfplumber's, and only single straight segments are lines,
+    like pdfminer's. Requires the PyMuPDF package.
+    """
+
+    name = "pymupdf"
+
+    def __init__(self, y_tolerance: float = 3) -> None:
+        self.y_tolerance = y_tolerance
+
+    def open(self, pdf_bytes: bytes) -> ContextManager[Any]:
+        import pymupdf  # type: ignore
+
+        return pymupdf.open(stream=pdf_bytes, filetype="pdf")
+
+    def get_pages(self, document: Any) -> Sequence[Any]:
+        return document
+
+    def get_page_size(self, page: Any) -> Tuple[float, float]:
+        return page.rect.width, page.rect.height
+
+    def get_words(self, page: Any) -> List[Dict[str, Any]]:
+        words = sorted(
+            (
+                {"text": text, "x0": x0, "top": top, "x1": x1, "bottom": bottom}
+                for x0, top, x1, bottom, text, *_ in page.get_text("words")
+            ),
+            key=lambda word: (word["top"], word["x0"]),
+        )
+
+        # Cluster into text lines by top, then read each line left to right
+        ordered_words: List[Dict[str, Any]] = []
+        line_words: List[Dict[str, Any]] = []
+        for word in words:
+            if line_words and word["top"] - line_words[0]["top"] > self.y_tolerance:
+                ordered_words.extend(sorted(line_words, key=lambda item: item["x0"]))
+                line_words = []
+            line_words.append(word)
+        ordered_words.extend(sorted(line_words, key=lambda item: item["x0"]))
+        return ordered_words
+
+    def get_lines(self, page: Any) -> List[Dict[str, Any]]:
+        height = page.rect.height
+        lines = []
+        for drawing in page.get_drawings():
+            items = drawing["items"]
+            if len(items) != 1 or items[0][0] != "l":
+                continue
+            _, start, end = items[0]
+            lines.append(
+                {
+                    "x0": min(start.x, end.x),
+                    "y0": height - max(start.y, end.y),
+                    "x1": max(start.x, end.x),
+                    "y1": height - min(start.y, end.y),
+                }
+            )
+        return lines
+
+    def get_number_of_pages(self, pdf_bytes: bytes) -> int:
+        with self.open(pdf_bytes) as document:
+            return document.page_count
+
+    def render_pages(
+        self, pdf_bytes: bytes, first_page: int, last_page: int, dpi: int = 200
+    ) -> List[Image.Image]:
+        images = []
+        with self.open(pdf_bytes) as document:
+            for page_index in range(first_page - 1, min(last_page, len(document))):
+                pixmap = document[page_index].get_pixmap(dpi=dpi)
+                images.append(
+                    Image.frombytes(
+                        "RGB", (pixmap.width, pixmap.height), pixmap.samples
+                    )
+                )
+        return images
+
+
+DEFAULT_BACKEND = PdfplumberBackend()
+
+
+def get_backend(backend: Optional[ExtractionBackend]) -> ExtractionBackend:
+    return backend if backend is not None else DEFAULT_BACKEND
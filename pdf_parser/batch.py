@@ -0,0 +1,208 @@
+import os
+import time
+import traceback
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, Future, ProcessPoolExecutor, wait
+from concurrent.futures.process import BrokenProcessPool
+from typing import Any, Deque, Dict, Iterable, Iterator, Optional, Set, Tuple, Union
+
+from pdf_parser.extractors import DataExtractor
+from pdf_parser.parser import Parser
+
+PdfSource = Union[bytes, str, "os.PathLike[str]"]
+
+
+class ParseResult:
+    """Outcome of parsing one document of a batch.
+
+    `output` is the JSON returned by Parser.parse_pdf, or None when the
+    document failed, in which case `error` and `traceback` describe the
+    exception. `timings` holds the seconds spent on extraction, parsing and
+    in total.
+    """
+
+    def __init__(
+        self,
+        index: int,
+        output: Optional[str] = None,
+        error: Optional[str] = None,
+        traceback: Optional[str] = None,
+        timings: Optional[Dict[str, float]] = None,
+    ) -> None:
+        self.index = index
+        self.output = output
+        self.error = error
+        self.traceback = traceback
+        self.timings = timings or {}
+
+    @property
+    def ok(self) -> bool:
+        return self.error is None
+
+    def __repr__(self) -> str:
+        status = "ok" if self.ok else f"error={self.error!r}"
+        return f"ParseResult(index={self.index}, {status})"
+
+
+def read_pdf(pdf: PdfSource) -> bytes:
+    if isinstance(pdf, bytes):
+        return pdf
+    with open(pdf, "rb") as pdf_file:
+        return pdf_file.read()
+
+
+def parse_document(
+    index: int,
+    template: Dict[str, Any],
+    pdf: PdfSource,
+    extractor_options: Dict[str, Any],
+    parser_options: Dict[str, Any],
+) -> ParseResult:
+    """Extract and parse one document, capturing any exception in the result."""
+    timings: Dict[str, float] = {}
+    start = time.perf_counter()
+    try:
+        data_extractor = DataExtractor(read_pdf(pdf), **extractor_options)
+        pdf_data = data_extractor.extract_data()
+        timings["extraction"] = time.perf_counter() - start
+
+        parse_start = time.perf_counter()
+        output = Parser.parse_pdf(
+            template, pdf_data, data_extractor.get_page_images(), **parser_options
+        )
+        timings["parsing"] = time.perf_counter() - parse_start
+    except Exception as e:
+        timings["total"] = time.perf_counter() - start
+        return ParseResult(
+            index,
+            error=f"{type(e).__name__}: {e}",
+            traceback=traceback.format_exc(),
+            timings=timings,
+        )
+
+    timings["total"] = time.perf_counter() - start
+    return ParseResult(index, output=output, timings=timings)
+
+
+def parse_many(
+    items: Iterable[Tuple[Dict[str, Any], PdfSource]],
+    max_workers: Optional[int] = None,
+    max_in_flight: Optional[int] = None,
+    extractor_options: Optional[Dict[str, Any]] = None,
+    parser_options: Optional[Dict[str, Any]] = None,
+) -> Iterator[ParseResult]:
+    """Extract and parse many documents on a process pool.
+
+    Items are (template, pdf) pairs where pdf is the PDF bytes or a path,
+    which is read in the worker. Results are yielded in completion order;
+    use ParseResult.index to match them to their items. A document that
+    raises is reported in its result and does not stop the batch.
+
+    A document that crashes its worker process breaks the pool, which
+    fails every document in it. The pool is then recreated and those
+    documents are parsed again one at a time, so only the document that
+    crashes a worker on its own is reported as failed.
+
+    At most max_in_flight documents (twice the number of workers by
+    default) are submitted at a time, and the items are consumed lazily,
+    so memory stays bounded however many documents there are. With
+    max_workers=1 the documents are parsed in this process.
+
+    extractor_options and parser_options are passed as keyword arguments
+    to DataExtractor and Parser.parse_pdf, and must be picklable.
+    """
+    workers = max_workers or os.cpu_count() or 1
+    in_flight_limit = max(max_in_flight or 2 * workers, 1)
+    extractor_options = extractor_options or {}
+    parser_options = parser_options or {}
+
+    if workers == 1:
+        for index, (template, pdf) in enumerate(items):
+            yield parse_document(
+                index, template, pdf, extractor_options, parser_options
+            )
+        return
+
+    item_iterator = enumerate(items)
+    # Documents a crashed worker may have been parsing, to parse again alone
+    retries: Deque[Tuple[int, Dict[str, Any], PdfSource]] = deque()
+    pending: Dict["Future[ParseResult]", Tuple[int, Dict[str, Any], PdfSource, bool]]
+    pending = {}
+    executor: Optional[ProcessPoolExecutor] = None
+    try:
+        while True:
+            if executor is None:
+                executor = ProcessPoolExecutor(max_workers=workers)
+            broken = False
+
+            # After a crash, only one document is in flight until the
+            # documents to retry are done
+            while (retries and not pending) or (
+                not retries and len(pending) < in_flight_limit
+            ):
+                isolated = bool(retries)
+                if isolated:
+                    index, template, pdf = retries.popleft()
+                else:
+                    next_item = next(item_iterator, None)
+                    if next_item is None:
+                        break
+                    index, (template, pdf) = next_item
+                try:
+                    future = executor.submit(
+                        parse_document,
+                        index,
+                        template,
+                        pdf,
+                        extractor_options,
+                        parser_options,
+                    )
+                except BrokenProcessPool:
+                    retries.appendleft((index, template, pdf))
+                    broken = True
+                    break
+                pending[future] = (index, template, pdf, isolated)
+            if not pending and not retries:
+                return
+
+            done: Set["Future[ParseResult]"] = set()
+            if pending:
+                done, _ = wait(pending, return_when=FIRST_COMPLETED)
+            if any(
+                isinstance(future.exception(), BrokenProcessPool) for future in done
+            ):
+                # Every document still in the broken pool fails with it
+                broken = True
+                done, _ = wait(pending)
+
+            for future in done:
+                index, template, pdf, isolated = pending.pop(future)
+                try:
+                    yield future.result()
+                except BrokenProcessPool as e:
+                    if not isolated:
+                        retries.append((index, template, pdf))
+                        continue
+                    # The document crashed a worker on its own
+                    yield ParseResult(
+                        index,
+                        error=f"{type(e).__name__}: {e}",
+                        traceback=traceback.format_exc(),
+                    )
+                except Exception as e:
+                    # The result could not be pickled or unpickled
+                    yield ParseResult(
+                        index,
+                        error=f"{type(e).__name__}: {e}",
+                        traceback=traceback.format_exc(),
+                    )
+
+            if broken:
+                executor.shutdown(wait=True)
+                executor = None
+    finally:
+        # Closing the generator early drops the documents not yet started
+        for future in pending:
+            future.cancel()
+        if executor is not None:
+            executor.shutdown(wait=True)
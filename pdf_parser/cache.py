@@ -0,0 +1,285 @@
+import hashlib
+import os
+import pickle
+import tempfile
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, Generic, Hashable, List, Optional, Tuple, TypeVar
+
+V = TypeVar("V")
+
+
+class LRUCache(Generic[V]):
+    """Thread-safe in-memory cache that evicts the least recently used entry."""
+
+    def __init__(self, max_entries: int = 1024) -> None:
+        self.max_entries = max_entries
+        self.entries: "OrderedDict[Hashable, V]" = OrderedDict()
+        self.lock = threading.Lock()
+
+    def get(self, key: Hashable) -> Optional[V]:
+        with self.lock:
+            if key not in self.entries:
+                return None
+            self.entries.move_to_end(key)
+            return self.entries[key]
+
+    def set(self, key: Hashable, value: V) -> None:
+        with self.lock:
+            self.entries[key] = value
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.max_entries:
+                self.entries.popitem(last=False)
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+    def __getstate__(self) -> Dict[str, Any]:
+        state = self.__dict__.copy()
+        del state["lock"]
+        return state
+
+    def __setstate__(self, state: Dict[str, Any]) -> None:
+        self.__dict__.update(state)
+        self.lock = threading.Lock()
+
+
+class DiskCache:
+    """Directory of cached values with a size cap and least recently used eviction.
+
+    Values are written to a temporary file and moved into place, so several
+    processes can share one directory without reading partial entries.
+    Reading an entry refreshes its modification time, which is what eviction
+    orders by.
+
+    The sizes of the entries are indexed in memory, so writes only scan the
+    directory when the cache outgrows its cap. Eviction then removes entries
+    down to low_water of the cap, so the scan is paid once per that many
+    bytes written rather than on every write.
+    """
+
+    low_water = 0.9
+
+    def __init__(self, directory: str, max_size: int = 1024**3) -> None:
+        self.directory = directory
+        self.max_size = max_size
+        os.makedirs(directory, exist_ok=True)
+        self.sizes = {path: size for path, size, _ in self.list_entries()}
+        self.size = sum(self.sizes.values())
+        self.lock = threading.Lock()
+
+    def __getstate__(self) -> Dict[str, Any]:
+        state = self.__dict__.copy()
+        del state["lock"]
+        return state
+
+    def __setstate__(self, state: Dict[str, Any]) -> None:
+        self.__dict__.update(state)
+        self.lock = threading.Lock()
+
+    def get_path(self, key: str) -> str:
+        return os.path.join(self.directory, key[:2], key)
+
+    def get(self, key: str) -> Optional[bytes]:
+        path = self.get_path(key)
+        try:
+            with open(path, "rb") as cache_file:
+                value = cache_file.read()
+            os.utime(path)
+        except FileNotFoundError:
+            # Missing, or evicted by another process
+            return None
+        return value
+
+    def set(self, key: str, value: bytes) -> None:
+        path = self.get_path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        file_descriptor, temporary_path = tempfile.mkstemp(
+            dir=os.path.dirname(path), prefix=".tmp-"
+        )
+        try:
+            with os.fdopen(file_descriptor, "wb") as cache_file:
+                cache_file.write(value)
+            os.replace(temporary_path, path)
+        except BaseException:
+            if os.path.exists(temporary_path):
+                os.remove(temporary_path)
+            raise
+
+        with self.lock:
+            # Replacing an entry only adds the difference in size
+            self.size += len(value) - self.sizes.get(path, 0)
+            self.sizes[path] = len(value)
+            if self.size > self.max_size:
+                self.evict()
+
+    def list_entries(self) -> List[Tuple[str, int, float]]:
+        """List (path, size, modification time) of every entry."""
+        entries = []
+        for root, _, file_names in os.walk(self.directory):
+            for file_name in file_names:
+                if file_name.startswith(".tmp-"):
+                    continue
+                path = os.path.join(root, file_name)
+                try:
+                    stat = os.stat(path)
+                except FileNotFoundError:
+                    continue
+                entries.append((path, stat.st_size, stat.st_mtime))
+        return entries
+
+    def evict(self) -> None:
+        """Remove the least recently used entries down to low_water of the cap.
+
+        The directory is scanned again first, to count the entries other
+        processes sharing it have written or evicted.
+        """
+        entries = sorted(self.list_entries(), key=lambda entry: entry[2])
+        self.sizes = {path: size for path, size, _ in entries}
+        self.size = sum(self.sizes.values())
+        target_size = self.max_size * self.low_water
+        for path, size, _ in entries:
+            if self.size <= target_size:
+                break
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+            del self.sizes[path]
+            self.size -= size
+
+
+class OCRCache:
+    """Cache of OCR results keyed by page image, pixel crop box and tesseract config.
+
+    Results are kept in an in-memory LRU tier and, when a directory is given,
+    in a size-capped on-disk tier that survives across processes and runs.
+    A copy sent to a worker process starts with the in-memory entries of the
+    original, but only the on-disk tier sees the results the worker adds.
+    """
+
+    def __init__(
+        self,
+        max_entries: int = 10000,
+        directory: Optional[str] = None,
+        max_disk_size: int = 256 * 1024**2,
+    ) -> None:
+        self.memory_cache: LRUCache[str] = LRUCache(max_entries)
+        self.disk_cache = (
+            DiskCache(directory, max_disk_size) if directory is not None else None
+        )
+        self.hits = 0
+        self.misses = 0
+        self.disk_hits = 0
+        self.lock = threading.Lock()
+
+    def __getstate__(self) -> Dict[str, Any]:
+        state = self.__dict__.copy()
+        del state["lock"]
+        return state
+
+    def __setstate__(self, state: Dict[str, Any]) -> None:
+        self.__dict__.update(state)
+        self.lock = threading.Lock()
+
+    @staticmethod
+    def get_key(
+        image_digest: str, crop_box: Tuple[int, int, int, int], config: str
+    ) -> str:
+        return hashlib.sha256(
+            f"{image_digest}|{crop_box}|{config}".encode("utf-8")
+        ).hexdigest()
+
+    def get(
+        self, image_digest: str, crop_box: Tuple[int, int, int, int], config: str = ""
+    ) -> Optional[str]:
+        key = self.get_key(image_digest, crop_box, config)
+        text = self.memory_cache.get(key)
+        if text is None and self.disk_cache is not None:
+            value = self.disk_cache.get(key)
+            if value is not None:
+                text = value.decode("utf-8")
+                self.memory_cache.set(key, text)
+                with self.lock:
+                    self.disk_hits += 1
+
+        with self.lock:
+            if text is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+        return text
+
+    def set(
+        self,
+        image_digest: str,
+        crop_box: Tuple[int, int, int, int],
+        text: str,
+        config: str = "",
+    ) -> None:
+        key = self.get_key(image_digest, crop_box, config)
+        self.memory_cache.set(key, text)
+        if self.disk_cache is not None:
+            self.disk_cache.set(key, text.encode("utf-8"))
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "disk_hits": self.disk_hits,
+            "memory_entries": len(self.memory_cache),
+        }
+
+
+class ExtractionCache:
+    """On-disk cache of extracted PDF data and rendered pages.
+
+    Entries are keyed by the SHA-256 of the PDF bytes together with the
+    extractor version and the options that change the output, so parsing a
+    corpus again with a new template skips pdfplumber, poppler and pixel
+    sampling. Rendered pages are stored as PNG, about 350 KB for an A4 page
+    at 200 dpi. The directory can be shared by concurrent workers. Entries
+    are pickled, so only share it between trusted processes.
+    """
+
+    def __init__(self, directory: str, max_size: int = 4 * 1024**3) -> None:
+        self.disk_cache = DiskCache(directory, max_size)
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def get_key(pdf_bytes: bytes, *parts: Any) -> str:
+        pdf_digest = hashlib.sha256(pdf_bytes).hexdigest()
+        return hashlib.sha256(
+            "|".join([pdf_digest, *map(str, parts)]).encode("utf-8")
+        ).hexdigest()
+
+    def get_pdf_data(self, key: str) -> Optional[Dict[str, Any]]:
+        value = self.disk_cache.get(f"{key}-data")
+        pdf_data = None
+        if value is not None:
+            try:
+                pdf_data = pickle.loads(value)
+            except Exception:
+                # Written by an incompatible version; extract again
+                pdf_data = None
+
+        if pdf_data is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return pdf_data
+
+    def set_pdf_data(self, key: str, pdf_data: Dict[str, Any]) -> None:
+        self.disk_cache.set(
+            f"{key}-data", pickle.dumps(pdf_data, protocol=pickle.HIGHEST_PROTOCOL)
+        )
+
+    def get_page(self, key: str, page_index: int) -> Optional[bytes]:
+        return self.disk_cache.get(f"{key}-page-{page_index}")
+
+    def set_page(self, key: str, page_index: int, value: bytes) -> None:
+        self.disk_cache.set(f"{key}-page-{page_index}", value)
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {"hits": self.hits, "misses": self.misses}
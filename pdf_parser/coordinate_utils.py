@@ -1,29 +1,245 @@
-from typing import Dict, List, Any
+import re
+from bisect import bisect_left, bisect_right
+from functools import lru_cache
+from typing import Dict, List, Any, Mapping, Match, Optional, Pattern, Sequence, Union
+
+import numpy as np
+
+from pdf_parser.instrumentation import Instrumentation, get_instrumentation
+from pdf_parser.page_data import PageWords
+from pdf_parser.templates import CompiledTemplate
+
+
+class WordIndex:
+    """Spatial index over the words of a page.
+
+    Words are sorted by the y-coordinate of their top edge, so a bounding box
+    query only inspects the words whose top edge lies in the box's vertical
+    range instead of every word on the page.
+    """
+
+    def __init__(self, text_coordinates: Sequence[Dict[str, Any]]) -> None:
+        self.items = text_coordinates
+
+        number_of_items = len(text_coordinates)
+        if isinstance(text_coordinates, PageWords):
+            self.texts: Union[Sequence[str], np.ndarray] = text_coordinates.texts
+            decimal_coordinates = text_coordinates.decimal_coordinates
+            self.top_left_x = np.ascontiguousarray(decimal_coordinates[:, 0])
+            self.top_left_y = np.ascontiguousarray(decimal_coordinates[:, 1])
+            self.bottom_right_x = np.ascontiguousarray(decimal_coordinates[:, 2])
+            self.bottom_right_y = np.ascontiguousarray(decimal_coordinates[:, 3])
+        else:
+            self.texts = [item["text"] for item in text_coordinates]
+            self.top_left_x = np.empty(number_of_items, dtype=np.float64)
+            self.top_left_y = np.empty(number_of_items, dtype=np.float64)
+            self.bottom_right_x = np.empty(number_of_items, dtype=np.float64)
+            self.bottom_right_y = np.empty(number_of_items, dtype=np.float64)
+            for index, item in enumerate(text_coordinates):
+                bounding_box = item["bounding_box"]["decimal_coordinates"]
+                self.top_left_x[index] = bounding_box["top_left"]["x"]
+                self.top_left_y[index] = bounding_box["top_left"]["y"]
+                self.bottom_right_x[index] = bounding_box["bottom_right"]["x"]
+                self.bottom_right_y[index] = bounding_box["bottom_right"]["y"]
+
+        self.order = np.argsort(self.top_left_y, kind="stable")
+        self.sorted_top_left_y = self.top_left_y[self.order]
+
+        # A box query bounds the bottom edge of a word; the top edge is bounded
+        # too as long as no word has its top below its bottom.
+        inverted_height = (
+            float(np.max(self.top_left_y - self.bottom_right_y))
+            if number_of_items
+            else 0.0
+        )
+        self.top_slack = inverted_height + 1e-9 if inverted_height > 0 else 0.0
+
+    def __len__(self) -> int:
+        return len(self.items)
+
+    def get_indexes_in_bounding_box(
+        self,
+        box_coordinates: Dict[str, Dict[str, float]],
+        threshold: float = 0.005,
+        instrumentation: Optional[Instrumentation] = None,
+    ) -> np.ndarray:
+        """Get the page order indexes of the words inside a bounding box."""
+        min_x = box_coordinates["top_left"]["x"] - threshold
+        min_y = box_coordinates["top_left"]["y"] - threshold
+        max_x = box_coordinates["bottom_right"]["x"] + threshold
+        max_y = box_coordinates["bottom_right"]["y"] + threshold
+
+        start = np.searchsorted(self.sorted_top_left_y, min_y, side="left")
+        stop = np.searchsorted(
+            self.sorted_top_left_y, max_y + self.top_slack, side="right"
+        )
+        candidates = self.order[start:stop]
+        if instrumentation is not None:
+            instrumentation.increment("words_scanned", len(candidates))
+
+        mask = (
+            (self.top_left_x[candidates] >= min_x)
+            & (self.top_left_y[candidates] >= min_y)
+            & (self.bottom_right_x[candidates] <= max_x)
+            & (self.bottom_right_y[candidates] <= max_y)
+        )
+        return np.sort(candidates[mask])
+
+    def get_items_in_bounding_box(
+        self,
+        box_coordinates: Dict[str, Dict[str, float]],
+        threshold: float = 0.005,
+    ) -> List[Dict[str, Any]]:
+        return [
+            self.items[index]
+            for index in self.get_indexes_in_bounding_box(box_coordinates, threshold)
+        ]
+
+
+@lru_cache(maxsize=256)
+def compile_regex(regex: str) -> Pattern[str]:
+    return re.compile(regex)
+
+
+class PageTextIndex:
+    """The text of a page, joined with spaces, with offsets back to its words.
+
+    Built once per page, so every regex form rule on the page searches the
+    same string rather than joining the words again, and a match can be
+    mapped back to the words, and so the coordinates, it covers.
+    """
+
+    def __init__(self, text_coordinates: Sequence[Dict[str, Any]]) -> None:
+        self.items = text_coordinates
+        if isinstance(text_coordinates, PageWords):
+            texts: Union[Sequence[str], np.ndarray] = text_coordinates.texts
+        else:
+            texts = [item["text"] for item in text_coordinates]
+        self.text = " ".join(texts)
+
+        # Offset in the text of the first character of each word
+        self.word_starts: List[int] = []
+        offset = 0
+        for text in texts:
+            self.word_starts.append(offset)
+            offset += len(text) + 1
+        self.word_ends = [
+            start + len(text) for start, text in zip(self.word_starts, texts)
+        ]
+
+    def search(self, regex: Union[str, Pattern[str]]) -> Optional[Match[str]]:
+        pattern = compile_regex(regex) if isinstance(regex, str) else regex
+        return pattern.search(self.text)
+
+    def get_first_match(self, regex: Union[str, Pattern[str]]) -> str:
+        """Get the first match like re.findall(regex, text)[0] would, or "".
+
+        Patterns with capture groups return their first group.
+        """
+        match = self.search(regex)
+        if match is None:
+            return ""
+        if match.re.groups:
+            return match.group(1) or ""
+        return match.group(0)
+
+    def get_word_indexes(self, start: int, end: int) -> range:
+        """Get the page order indexes of the words overlapping text[start:end]."""
+        first = bisect_right(self.word_starts, start) - 1
+        if first < 0 or self.word_ends[first] <= start:
+            first += 1
+        last = bisect_left(self.word_starts, max(end, start + 1))
+        return range(first, last)
+
+    def get_match_items(self, match: Match[str], group: int = 0) -> List[Any]:
+        """Get the words covered by a match group, with their coordinates."""
+        start, end = match.span(group)
+        return [self.items[index] for index in self.get_word_indexes(start, end)]
 
 
 class CoordinateUtils:
+    def __init__(self, instrumentation: Optional[Instrumentation] = None) -> None:
+        self.word_indexes: Dict[int, WordIndex] = {}
+        self.text_indexes: Dict[int, PageTextIndex] = {}
+        self.instrumentation = get_instrumentation(instrumentation)
+
     @staticmethod
-    def get_rule_from_id(rule_id: str, template: Dict[str, Any]) -> Dict[str, Any]:
+    def get_rule_from_id(rule_id: str, template: Mapping[str, Any]) -> Dict[str, Any]:
+        if isinstance(template, CompiledTemplate):
+            return template.get_rule(rule_id)
         return [item for item in template["rules"] if item["rule_id"] == rule_id][0]
 
-    @staticmethod
+    def get_word_index(self, text_coordinates: Sequence[Dict[str, Any]]) -> WordIndex:
+        """Get the spatial index for a page's words, building it on first use."""
+        if isinstance(text_coordinates, PageWords):
+            if text_coordinates.word_index is None:
+                text_coordinates.word_index = WordIndex(text_coordinates)
+            return text_coordinates.word_index
+
+        word_index = self.word_indexes.get(id(text_coordinates))
+        if word_index is None or word_index.items is not text_coordinates:
+            word_index = WordIndex(text_coordinates)
+            self.word_indexes[id(text_coordinates)] = word_index
+        return word_index
+
+    def get_text_index(
+        self, text_coordinates: Sequence[Dict[str, Any]]
+    ) -> PageTextIndex:
+        """Get the text index for a page's words, building it on first use."""
+        if isinstance(text_coordinates, PageWords):
+            if text_coordinates.text_index is None:
+                text_coordinates.text_index = PageTextIndex(text_coordinates)
+            return text_coordinates.text_index
+
+        text_index = self.text_indexes.get(id(text_coordinates))
+        if text_index is None or text_index.items is not text_coordinates:
+            text_index = PageTextIndex(text_coordinates)
+            self.text_indexes[id(text_coordinates)] = text_index
+        return text_index
+
+    def release_page_content(self, text_coordinates: Sequence[Dict[str, Any]]) -> None:
+        """Drop the indexes built over a page's words."""
+        self.word_indexes.pop(id(text_coordinates), None)
+        self.text_indexes.pop(id(text_coordinates), None)
+
     def get_items_in_bounding_box(
-        text_coordinates: List[Dict[str, Any]],
+        self,
+        text_coordinates: Sequence[Dict[str, Any]],
         box_coordinates: Dict[str, Dict[str, float]],
         threshold: float = 0.005,
     ) -> List[Dict[str, Any]]:
-        items_in_box = []
-        for item in text_coordinates:
-            bounding_box = item["bounding_box"]["decimal_coordinates"]
-            if (
-                bounding_box["top_left"]["x"]
-                >= box_coordinates["top_left"]["x"] - threshold
-                and bounding_box["top_left"]["y"]
-                >= box_coordinates["top_left"]["y"] - threshold
-                and bounding_box["bottom_right"]["x"]
-                <= box_coordinates["bottom_right"]["x"] + threshold
-                and bounding_box["bottom_right"]["y"]
-                <= box_coordinates["bottom_right"]["y"] + threshold
-            ):
-                items_in_box.append(item)
-        return items_in_box
+        word_index = self.get_word_index(text_coordinates)
+        return [
+            word_index.items[index]
+            for index in word_index.get_indexes_in_bounding_box(
+                box_coordinates, threshold, self.instrumentation
+            )
+        ]
+
+    def get_text_in_bounding_box(
+        self,
+        text_coordinates: Sequence[Dict[str, Any]],
+        box_coordinates: Dict[str, Dict[str, float]],
+        threshold: float = 0.005,
+    ) -> str:
+        """Get the space-joined text of the words inside a bounding box."""
+        word_index = self.get_word_index(text_coordinates)
+        return " ".join(
+            word_index.texts[index]
+            for index in word_index.get_indexes_in_bounding_box(
+                box_coordinates, threshold, self.instrumentation
+            )
+        )
+
+    def get_top_y_coordinates_in_bounding_box(
+        self,
+        text_coordinates: Sequence[Dict[str, Any]],
+        box_coordinates: Dict[str, Dict[str, float]],
+        threshold: float = 0.005,
+    ) -> List[float]:
+        """Get the top y-coordinates of the words inside a bounding box."""
+        word_index = self.get_word_index(text_coordinates)
+        indexes = word_index.get_indexes_in_bounding_box(
+            box_coordinates, threshold, self.instrumentation
+        )
+        return word_index.top_left_y[indexes].tolist()
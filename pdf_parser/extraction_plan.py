@@ -0,0 +1,114 @@
+from typing import Any, Dict, Iterable, List, Optional, Set, Union
+
+from pdf_parser.templates import CompiledTemplate
+
+
+class ExtractionPlan:
+    """The pages and data DataExtractor has to extract for some templates.
+
+    Derived from the page rules of the templates: pages no page rule refers
+    to are skipped, page lines are only extracted when a table is split by
+    lines, and their colours are only sampled, which means rendering the
+    page, when such a table filters lines with a max_pixel_value below 255.
+    Words are only extracted for extraction templates, regex forms and
+    tables split by a field.
+    """
+
+    def __init__(
+        self,
+        page_numbers: Optional[List[str]] = None,
+        words: bool = True,
+        lines: bool = True,
+        pixels: bool = True,
+    ) -> None:
+        # Page number expressions of the page rules; None extracts every page
+        self.page_numbers = page_numbers
+        self.words = words
+        self.lines = lines
+        self.pixels = pixels and lines
+
+    @classmethod
+    def from_template(
+        cls, template: Union[Dict[str, Any], CompiledTemplate]
+    ) -> "ExtractionPlan":
+        compiled_template = CompiledTemplate.compile(template)
+        extraction = compiled_template.extraction_method == "extraction"
+
+        page_numbers = []
+        words = False
+        lines = False
+        pixels = False
+        for page_rule in compiled_template["pages"]:
+            form_rule_ids = page_rule.get("forms", [])
+            table_rule_ids = page_rule.get("tables", [])
+            if not form_rule_ids and not table_rule_ids:
+                continue
+            page_numbers.append(page_rule["page_numbers"])
+
+            for rule_id in form_rule_ids:
+                rule = compiled_template.rules.get(rule_id)
+                if rule is None:
+                    continue
+                if extraction or rule["config"].get("search_type") == "regex":
+                    words = True
+
+            for rule_id in table_rule_ids:
+                rule = compiled_template.rules.get(rule_id)
+                if rule is None:
+                    continue
+                row_delimiter = rule["config"]["row_delimiter"]
+                if extraction or row_delimiter["type"] == "field":
+                    words = True
+                if row_delimiter["type"] == "line":
+                    lines = True
+                    if row_delimiter.get("max_pixel_value", 255) < 255:
+                        pixels = True
+
+        return cls(page_numbers, words=words, lines=lines, pixels=pixels)
+
+    @classmethod
+    def from_templates(
+        cls, templates: Iterable[Union[Dict[str, Any], CompiledTemplate]]
+    ) -> "ExtractionPlan":
+        """Plan the extraction of a document parsed with each of several templates."""
+        plans = [cls.from_template(template) for template in templates]
+        return cls(
+            [
+                page_numbers
+                for plan in plans
+                for page_numbers in plan.page_numbers or []
+            ],
+            words=any(plan.words for plan in plans),
+            lines=any(plan.lines for plan in plans),
+            pixels=any(plan.pixels for plan in plans),
+        )
+
+    def get_page_indexes(self, number_of_pages: int) -> Optional[Set[int]]:
+        """Get the indexes of the pages to extract, or None for every page."""
+        if self.page_numbers is None:
+            return None
+        page_indexes = set()
+        for page_numbers in self.page_numbers:
+            for page_index in CompiledTemplate.page_number_converter(
+                page_numbers, number_of_pages
+            ):
+                # The pages rules read, including through negative indexes
+                page_index = CompiledTemplate.resolve_page_index(
+                    page_index, number_of_pages
+                )
+                if 0 <= page_index < number_of_pages:
+                    page_indexes.add(page_index)
+        return page_indexes
+
+    def get_key(self) -> str:
+        """A key for the extracted data, for the extraction cache."""
+        page_numbers = (
+            "*" if self.page_numbers is None else ",".join(sorted(self.page_numbers))
+        )
+        return f"{page_numbers}|{self.words:d}{self.lines:d}{self.pixels:d}"
+
+    def __repr__(self) -> str:
+        return (
+            f"ExtractionPlan(page_numbers={self.page_numbers!r}, words={self.words},"
+            f" lines={self.lines}, pixels={self.pixels})"
+        )
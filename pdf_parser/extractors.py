@@ -1,18 +1,111 @@
 import io
+import math
 import os
 import re
-from typing import Dict, List, Tuple, Any, Optional, Union
+import threading
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from typing import (
+    Dict,
+    Iterator,
+    List,
+    Tuple,
+    Any,
+    Optional,
+    Pattern,
+    Sequence,
+    Union,
+)
 
 import numpy as np
-import pdfplumber
 import pytesseract  # type: ignore
-from pdf2image import convert_from_bytes
 from PIL import Image
 
+from pdf_parser.backends import ExtractionBackend, get_backend
+from pdf_parser.cache import ExtractionCache, OCRCache
+from pdf_parser.extraction_plan import ExtractionPlan
+from pdf_parser.instrumentation import Instrumentation, get_instrumentation
+from pdf_parser.ocr import ImageHasher, OCRExecutor, PageOCR
+from pdf_parser.page_data import ColumnarPage, PageLines, PageRaster, PageWords
+
+# Bump when a change to extraction changes its output, so ExtractionCache
+# entries written by older versions are not reused
+EXTRACTOR_VERSION = "2"
+
 
 class DataExtractor:
-    def __init__(self, pdf_bytes: bytes):
+    def __init__(
+        self,
+        pdf_bytes: bytes,
+        columnar: bool = False,
+        page_images: Optional["PageImageProvider"] = None,
+        render_window_size: int = 4,
+        max_workers: Optional[int] = 1,
+        parallel_page_threshold: int = 16,
+        raster_pages: bool = False,
+        extraction_cache: Optional[ExtractionCache] = None,
+        instrumentation: Optional[Instrumentation] = None,
+        plan: Optional[ExtractionPlan] = None,
+        backend: Optional[ExtractionBackend] = None,
+    ):
+        """
+        Args:
+            pdf_bytes: The PDF file contents.
+            columnar: Store each page's words and lines in a ColumnarPage
+                instead of lists of dictionaries.
+            page_images: Page images of the PDF. By default a lazy
+                PageImageProvider is created, available as `page_images`
+                after extraction so it can be passed on to Parser.parse_pdf.
+            render_window_size: Number of pages the default provider renders
+                per poppler call. Pages are consumed one at a time, so memory
+                stays flat with respect to the number of pages.
+            max_workers: Number of processes to extract pages with. None uses
+                every CPU; 1 extracts in this process.
+            parallel_page_threshold: Documents with fewer pages than this are
+                always extracted in this process.
+            raster_pages: Keep rendered pages as raw pixel buffers instead of
+                JPEG bytes, and sample line colours from the exact pixels.
+            extraction_cache: Reuse the extracted data and rendered pages of
+                a PDF extracted before with the same options.
+            instrumentation: Records the time spent in pdfplumber, rendering
+                and pixel sampling, and counts pages, words and lines.
+            plan: Extract only the pages and data the templates of an
+                ExtractionPlan use. Skipped pages are kept, without words or
+                lines, so page indexes are unchanged.
+            backend: Reads the words, lines and page images of the PDF. By
+                default pdfplumber and poppler; see pdf_parser.backends.
+        """
         self.pdf_bytes = pdf_bytes
+        self.columnar = columnar
+        self.page_images = page_images
+        self.render_window_size = render_window_size
+        self.max_workers = max_workers if max_workers else os.cpu_count() or 1
+        self.parallel_page_threshold = parallel_page_threshold
+        self.raster_pages = raster_pages
+        self.extraction_cache = extraction_cache
+        self.instrumentation = get_instrumentation(instrumentation)
+        self.plan = plan
+        self.backend = get_backend(backend)
+        self.cache_key = (
+            extraction_cache.get_key(
+                pdf_bytes, EXTRACTOR_VERSION, columnar, raster_pages, self.backend.name
+            )
+            if extraction_cache is not None
+            else None
+        )
+        # Rendered pages do not depend on the plan, the extracted data does
+        self.data_cache_key: Optional[str] = (
+            extraction_cache.get_key(
+                pdf_bytes,
+                EXTRACTOR_VERSION,
+                columnar,
+                raster_pages,
+                self.backend.name,
+                plan.get_key(),
+            )
+            if extraction_cache is not None and plan is not None
+            else self.cache_key
+        )
 
     def extract_data(self) -> Dict[str, Any]:
         """
@@ -21,75 +114,284 @@ class DataExtractor:
         Returns:
             dict: Dictionary containing extracted text, bounding box information, line coordinates, number of pages, and dimensions.
         """
-        pdf_jpg_files = ImageExtractor(self.pdf_bytes).convert_pdf_to_jpg_files()
+        with self.instrumentation.stage("extract"):
+            return self.extract_document_data()
+
+    def extract_document_data(self) -> Dict[str, Any]:
+        if self.extraction_cache is not None and self.data_cache_key is not None:
+            cached_data = self.extraction_cache.get_pdf_data(self.data_cache_key)
+            if cached_data is not None:
+                self.instrumentation.increment("extraction_cache_hits")
+                if self.page_images is None:
+                    self.page_images = self.create_page_image_provider(
+                        cached_data["number_of_pages"]
+                    )
+                return cached_data
+
+        with self.backend.open(self.pdf_bytes) as pdf:
+            number_of_pages = len(self.backend.get_pages(pdf))
+            if self.page_images is None:
+                self.page_images = self.create_page_image_provider(number_of_pages)
 
-        with pdfplumber.open(io.BytesIO(self.pdf_bytes)) as pdf:
             data: Dict[str, Any] = {
                 "pages": [],
-                "number_of_pages": len(pdf.pages),
+                "number_of_pages": number_of_pages,
                 "dimensions": self.get_dimensions(pdf),
             }
-            for page_num, page in enumerate(pdf.pages):
-                page_data = self.extract_page_text_data(page)
+            page_indexes = (
+                self.plan.get_page_indexes(number_of_pages)
+                if self.plan is not None
+                else None
+            )
+            number_of_pages_to_extract = (
+                number_of_pages if page_indexes is None else len(page_indexes)
+            )
+            if (
+                self.max_workers > 1
+                and number_of_pages_to_extract >= self.parallel_page_threshold
+            ):
+                with self.instrumentation.stage("extract.parallel"):
+                    data["pages"] = self.extract_pages_in_parallel(number_of_pages)
+                self.instrumentation.increment(
+                    "pages_extracted", number_of_pages_to_extract
+                )
+            else:
+                data["pages"] = self.extract_pages(pdf, 0, number_of_pages)
+
+        if self.extraction_cache is not None and self.data_cache_key is not None:
+            self.extraction_cache.set_pdf_data(self.data_cache_key, data)
+        return data
 
-                line_data = self.extract_page_line_data(page, pdf_jpg_files[page_num])
+    def get_number_of_pages(self) -> int:
+        return self.backend.get_number_of_pages(self.pdf_bytes)
 
-                data["pages"].append(
+    def iter_pages(self) -> Iterator[Any]:
+        """Extract the pages one at a time, in page order.
+
+        Only the page being extracted is held. The extraction cache and
+        worker processes are not used.
+        """
+        with self.backend.open(self.pdf_bytes) as pdf:
+            pages = self.backend.get_pages(pdf)
+            if self.page_images is None:
+                self.page_images = self.create_page_image_provider(len(pages))
+            for page_index in range(len(pages)):
+                with self.instrumentation.stage("extract"):
+                    page = self.extract_pages(pdf, page_index, page_index + 1)[0]
+                yield page
+
+    def create_page_image_provider(self, number_of_pages: int) -> "PageImageProvider":
+        return PageImageProvider(
+            self.pdf_bytes,
+            number_of_pages=number_of_pages,
+            window_size=self.render_window_size,
+            raster=self.raster_pages,
+            extraction_cache=self.extraction_cache,
+            cache_key=self.cache_key,
+            instrumentation=self.instrumentation,
+            backend=self.backend,
+        )
+
+    def get_page_images(self) -> "PageImageProvider":
+        """Get the page images, creating the lazy provider if there is none yet."""
+        if self.page_images is None:
+            self.page_images = self.create_page_image_provider(
+                self.get_number_of_pages()
+            )
+        return self.page_images
+
+    def extract_pages(
+        self, pdf: Any, first_page_index: int, stop_page_index: int
+    ) -> List[Any]:
+        """Extract the pages in [first_page_index, stop_page_index) of an open PDF."""
+        pdf_pages = self.backend.get_pages(pdf)
+        if self.page_images is None:
+            self.page_images = self.create_page_image_provider(len(pdf_pages))
+
+        page_indexes = (
+            self.plan.get_page_indexes(len(pdf_pages))
+            if self.plan is not None
+            else None
+        )
+        extract_lines = self.plan is None or self.plan.lines
+        sample_pixels = self.plan is None or self.plan.pixels
+
+        pages: List[Any] = []
+        for page_num in range(first_page_index, stop_page_index):
+            if page_indexes is not None and page_num not in page_indexes:
+                pages.append(self.get_empty_page(page_num))
+                continue
+
+            page = pdf_pages[page_num]
+            self.instrumentation.increment("pages_extracted")
+            # Reading the lines first parses the page layout
+            with self.instrumentation.stage(f"{self.backend.name}.layout"):
+                lines = self.backend.get_lines(page) if extract_lines else []
+            has_lines = bool(lines)
+            # Only pages with lines need their image, to sample line colours
+            page_image = (
+                ImageExtractor.get_page_image(self.page_images, page_num)
+                if has_lines and sample_pixels
+                else None
+            )
+
+            if self.columnar:
+                pages.append(
+                    self.extract_columnar_page(page, page_num, page_image, lines)
+                )
+            else:
+                page_data = (
+                    self.extract_page_text_data(page)
+                    if self.plan is None or self.plan.words
+                    else []
+                )
+
+                line_data = self.extract_page_line_data(page, page_image, lines)
+
+                pages.append(
                     {
                         "page_number": page_num + 1,
                         "content": page_data,
                         "lines": line_data,
                     }
                 )
-            return data
+            # Drop the backend's layout objects for the page once its words
+            # and lines are taken
+            self.backend.release_page(page)
+        return pages
+
+    def extract_pages_in_parallel(self, number_of_pages: int) -> List[Any]:
+        """Extract contiguous page ranges in worker processes, in page order.
+
+        Each worker opens the PDF and renders its own pages, so the result
+        is the same as extracting every page in this process.
+        """
+        pages_per_worker = math.ceil(number_of_pages / self.max_workers)
+        page_ranges = [
+            (
+                first_page_index,
+                min(first_page_index + pages_per_worker, number_of_pages),
+            )
+            for first_page_index in range(0, number_of_pages, pages_per_worker)
+        ]
+
+        pages: List[Any] = []
+        with ProcessPoolExecutor(max_workers=len(page_ranges)) as executor:
+            futures = [
+                executor.submit(
+                    extract_page_range,
+                    self.pdf_bytes,
+                    first_page_index,
+                    stop_page_index,
+                    self.columnar,
+                    self.render_window_size,
+                    self.raster_pages,
+                    self.plan,
+                    self.backend,
+                )
+                for first_page_index, stop_page_index in page_ranges
+            ]
+            for future in futures:
+                pages.extend(future.result())
+        return pages
 
     def get_dimensions(self, pdf: Any) -> Dict[str, float]:
         """Get the dimensions of the first page of the PDF."""
+        width, height = self.backend.get_page_size(self.backend.get_pages(pdf)[0])
         return {
-            "width": round(pdf.pages[0].width, 2),
-            "height": round(pdf.pages[0].height, 2),
+            "width": round(width, 2),
+            "height": round(height, 2),
         }
 
+    def extract_columnar_page(
+        self,
+        page: Any,
+        page_num: int,
+        jpg_bytes: Union[bytes, Image.Image, PageRaster, None],
+        lines: Optional[List[Dict[str, Any]]] = None,
+    ) -> ColumnarPage:
+        """Extract the words and lines of a page into columnar storage."""
+        words = self.extract_words(page) if self.plan is None or self.plan.words else []
+        width, height = self.backend.get_page_size(page)
+        return ColumnarPage(
+            page_num + 1,
+            PageWords.from_pdfplumber_words(words, width, height),
+            PageLines.from_items(self.extract_page_line_data(page, jpg_bytes, lines)),
+        )
+
+    def get_empty_page(self, page_num: int) -> Any:
+        """A page skipped by the extraction plan, with no words or lines."""
+        if self.columnar:
+            return ColumnarPage(
+                page_num + 1,
+                PageWords.from_pdfplumber_words([], 1, 1),
+                PageLines.from_items([]),
+            )
+        return {"page_number": page_num + 1, "content": [], "lines": []}
+
+    def extract_words(self, page: Any) -> List[Dict[str, Any]]:
+        with self.instrumentation.stage(f"{self.backend.name}.words"):
+            words = self.backend.get_words(page)
+        self.instrumentation.increment("words_extracted", len(words))
+        return words
+
     def extract_page_line_data(
-        self, page: Any, jpg_bytes: bytes
+        self,
+        page: Any,
+        jpg_bytes: Union[bytes, Image.Image, PageRaster, None],
+        lines: Optional[List[Dict[str, Any]]] = None,
     ) -> List[Dict[str, Any]]:
-        """Extract line data from a page."""
+        """Extract line data from a page, or from its lines if already read."""
         image_extractor = ImageExtractor(self.pdf_bytes)
-        line_data: List[Dict[str, Any]] = []
-        for line in page.lines:
+        if lines is None:
+            lines = self.backend.get_lines(page)
+        width, height = self.backend.get_page_size(page)
+        line_coordinates: List[Dict[str, Dict[str, float]]] = []
+        for line in lines:
             # Ensure line has the necessary keys before proceeding
             if "x0" in line and "y0" in line and "x1" in line and "y1" in line:
-                coordinates = {
-                    "top_left": {
-                        "x": round(line["x0"] / page.width, 6),
-                        "y": round(1 - (line["y0"] / page.height), 6),
-                    },
-                    "bottom_right": {
-                        "x": round(line["x1"] / page.width, 6),
-                        "y": round(1 - (line["y1"] / page.height), 6),
-                    },
-                }
-                (
-                    average_pixel_value,
-                    _,
-                    _,
-                    _,
-                ) = image_extractor.calculate_average_pixel_value(
-                    jpg_bytes,
-                    coordinates,
-                )
-                line_data.append(
+                line_coordinates.append(
                     {
-                        "decimal_coordinates": coordinates,
-                        "average_pixel_value": average_pixel_value,
+                        "top_left": {
+                            "x": round(line["x0"] / width, 6),
+                            "y": round(1 - (line["y0"] / height), 6),
+                        },
+                        "bottom_right": {
+                            "x": round(line["x1"] / width, 6),
+                            "y": round(1 - (line["y1"] / height), 6),
+                        },
                     }
                 )
-        return line_data
+
+        if line_coordinates and self.plan is not None and not self.plan.pixels:
+            # No table filters lines by colour, so the page is not rendered
+            return [
+                {"decimal_coordinates": coordinates} for coordinates in line_coordinates
+            ]
+
+        if not line_coordinates or jpg_bytes is None:
+            return []
+
+        with self.instrumentation.stage("pixel_sampling"):
+            average_pixel_values = image_extractor.calculate_average_pixel_values(
+                jpg_bytes, line_coordinates
+            )
+        self.instrumentation.increment("lines_sampled", len(line_coordinates))
+        return [
+            {
+                "decimal_coordinates": coordinates,
+                "average_pixel_value": average_pixel_value,
+            }
+            for coordinates, average_pixel_value in zip(
+                line_coordinates, average_pixel_values
+            )
+        ]
 
     def extract_page_text_data(self, page: Any) -> List[Dict[str, Any]]:
         """Extract text and bounding box information from a page."""
+        width, height = self.backend.get_page_size(page)
         page_data: List[Dict[str, Any]] = []
-        for element in page.extract_words():
+        for element in self.extract_words(page):
             text = element["text"]
             x0, y0, x1, y1 = (
                 round(element["x0"], 2),
@@ -107,12 +409,12 @@ class DataExtractor:
                         },
                         "decimal_coordinates": {
                             "top_left": {
-                                "x": round((x0 / page.width), 6),
-                                "y": round((y0 / page.height), 6),
+                                "x": round((x0 / width), 6),
+                                "y": round((y0 / height), 6),
                             },
                             "bottom_right": {
-                                "x": round((x1 / page.width), 6),
-                                "y": round((y1 / page.height), 6),
+                                "x": round((x1 / width), 6),
+                                "y": round((y1 / height), 6),
                             },
                         },
                     },
@@ -121,49 +423,155 @@ class DataExtractor:
         return page_data
 
 
+def extract_page_range(
+    pdf_bytes: bytes,
+    first_page_index: int,
+    stop_page_index: int,
+    columnar: bool,
+    render_window_size: int,
+    raster_pages: bool = False,
+    plan: Optional[ExtractionPlan] = None,
+    backend: Optional[ExtractionBackend] = None,
+) -> List[Any]:
+    """Extract a range of pages; run in the worker processes of DataExtractor."""
+    data_extractor = DataExtractor(
+        pdf_bytes,
+        columnar=columnar,
+        render_window_size=render_window_size,
+        raster_pages=raster_pages,
+        plan=plan,
+        backend=backend,
+    )
+    with data_extractor.backend.open(pdf_bytes) as pdf:
+        return data_extractor.extract_pages(pdf, first_page_index, stop_page_index)
+
+
 class ImageExtractor:
-    def __init__(self, image_data: Union[bytes, Image.Image]):
+    def __init__(
+        self,
+        image_data: Union[bytes, Image.Image, PageRaster],
+        backend: Optional[ExtractionBackend] = None,
+    ):
         self.image_data = image_data
+        self.backend = get_backend(backend)
 
     def get_image(self) -> Image.Image:
         """Get PIL Image object from the image data."""
         if isinstance(self.image_data, Image.Image):
             return self.image_data
+        if isinstance(self.image_data, PageRaster):
+            return self.image_data.to_image()
         return Image.open(io.BytesIO(self.image_data)).convert("RGB")
 
-    def convert_pdf_to_jpg_files(self) -> List[bytes]:
+    def convert_pdf_to_jpg_files(self, window_size: int = 10) -> List[bytes]:
         """Convert the PDF into several JPG files, one for each page.
 
+        Args:
+            window_size: Number of pages rendered per poppler call. Only one
+                window of full resolution images is held in memory at a time.
+
         Returns:
             list: List of JPEG bytes for each page.
         """
+        return list(self.iter_jpg_files(window_size))
+
+    def get_number_of_pages(self) -> int:
         if not isinstance(self.image_data, bytes):
             raise ValueError("PDF conversion requires bytes input")
 
-        images = convert_from_bytes(self.image_data)
-        jpg_files = []
-        for image in images:
-            img_byte_arr = io.BytesIO()
-            image.save(img_byte_arr, format="JPEG")
-            jpg_files.append(img_byte_arr.getvalue())
-        return jpg_files
+        return self.backend.get_number_of_pages(self.image_data)
 
-    def extract_text_from_coordinates(self, coordinates: Dict[str, Any]) -> str:
-        """Extract text from specific coordinates in an image using OCR."""
-        image = self.get_image()
+    def iter_pdf_images(
+        self,
+        window_size: int = 10,
+        first_page: int = 1,
+        last_page: Optional[int] = None,
+    ) -> Iterator[Image.Image]:
+        """Render the PDF in windows of pages, yielding one page image at a time.
+
+        Each image is released by the generator once the next one is
+        requested, so peak memory depends on the window size rather than on
+        the number of pages.
+        """
+        if not isinstance(self.image_data, bytes):
+            raise ValueError("PDF conversion requires bytes input")
+
+        if last_page is None:
+            last_page = self.get_number_of_pages()
+
+        for window_first_page in range(first_page, last_page + 1, window_size):
+            images = self.backend.render_pages(
+                self.image_data,
+                window_first_page,
+                min(window_first_page + window_size - 1, last_page),
+            )
+            images.reverse()
+            while images:
+                yield images.pop()
+
+    def iter_jpg_files(self, window_size: int = 10) -> Iterator[bytes]:
+        """Yield the JPEG bytes of each page, rendering in windows of pages."""
+        for image in self.iter_pdf_images(window_size):
+            yield self.convert_image_to_jpg_bytes(image)
+
+    @staticmethod
+    def convert_image_to_jpg_bytes(image: Image.Image) -> bytes:
+        img_byte_arr = io.BytesIO()
+        image.save(img_byte_arr, format="JPEG")
+        return img_byte_arr.getvalue()
+
+    @staticmethod
+    def get_page_image(
+        jpg_bytes: Sequence[Union[bytes, Image.Image]], page_index: int
+    ) -> Union[bytes, Image.Image, PageRaster]:
+        """Get a page from a list of JPEG bytes or a PageImageProvider.
+
+        Pages from a PageImageProvider are returned decoded, or as a
+        PageRaster in raster mode, so repeated use of the same page does not
+        decode a JPEG again.
+        """
+        if isinstance(jpg_bytes, PageImageProvider):
+            if jpg_bytes.raster:
+                return jpg_bytes.get_raster(page_index)
+            return jpg_bytes.get_image(page_index)
+        return jpg_bytes[page_index]
+
+    @staticmethod
+    def get_crop_box(
+        image: Union[Image.Image, PageRaster], coordinates: Dict[str, Any]
+    ) -> Tuple[int, int, int, int]:
+        """Convert decimal coordinates to a pixel crop box of an image."""
         x_min = int(coordinates["top_left"]["x"] * image.width)
         y_min = int(coordinates["top_left"]["y"] * image.height)
         x_max = int(coordinates["bottom_right"]["x"] * image.width)
         y_max = int(coordinates["bottom_right"]["y"] * image.height)
-        cropped_image = image.crop((x_min, y_min, x_max, y_max))
-        return pytesseract.image_to_string(cropped_image).strip()
+        return (x_min, y_min, x_max, y_max)
+
+    def extract_text_from_coordinates(
+        self, coordinates: Dict[str, Any], config: str = ""
+    ) -> str:
+        """Extract text from specific coordinates in an image using OCR."""
+        if isinstance(self.image_data, PageRaster):
+            crop_box = self.get_crop_box(self.image_data, coordinates)
+            cropped_image = Image.fromarray(self.image_data.crop(crop_box))
+            return pytesseract.image_to_string(cropped_image, config=config).strip()
+
+        image = self.get_image()
+        cropped_image = image.crop(self.get_crop_box(image, coordinates))
+        return pytesseract.image_to_string(cropped_image, config=config).strip()
 
     def calculate_average_pixel_value(
-        self, jpg_bytes: bytes, coordinates: Dict[str, Dict[str, float]]
+        self,
+        jpg_bytes: Union[bytes, PageRaster],
+        coordinates: Dict[str, Dict[str, float]],
     ) -> Tuple[List[int], np.ndarray, Image.Image, Tuple[int, int, int, int]]:
         # Load the image from bytes
-        image = Image.open(io.BytesIO(jpg_bytes)).convert("RGB")
-        pixels = np.array(image)
+        if isinstance(jpg_bytes, PageRaster):
+            image = jpg_bytes.to_image()
+            pixels = jpg_bytes.pixels
+        else:
+            image = Image.open(io.BytesIO(jpg_bytes)).convert("RGB")
+            pixels = np.array(image)
 
         # Calculate the coordinates in pixel values
         x_min = int(coordinates["top_left"]["x"] * image.width)
@@ -198,19 +606,386 @@ class ImageExtractor:
             (round(x_min), round(y_min), round(x_max), round(y_max)),
         )
 
+    def calculate_average_pixel_values(
+        self,
+        jpg_bytes: Union[bytes, Image.Image, PageRaster],
+        coordinates_list: List[Dict[str, Dict[str, float]]],
+    ) -> List[List[int]]:
+        """Calculate the average pixel value of many regions, decoding the image once.
+
+        Gives the same values as calling calculate_average_pixel_value for each
+        region. One pixel wide vertical and horizontal lines, which is what
+        pages are made of, are summed with prefix sums in one pass per
+        orientation.
+        """
+        if isinstance(jpg_bytes, PageRaster):
+            pixels = jpg_bytes.pixels
+        else:
+            if isinstance(jpg_bytes, Image.Image):
+                image = jpg_bytes.convert("RGB")
+            else:
+                image = Image.open(io.BytesIO(jpg_bytes)).convert("RGB")
+            pixels = np.asarray(image)
+        height, width = pixels.shape[:2]
+
+        average_pixel_values = [[0, 0, 0] for _ in coordinates_list]
+        horizontal_lines: List[Tuple[int, int, int, int]] = []
+        vertical_lines: List[Tuple[int, int, int, int]] = []
+
+        for index, coordinates in enumerate(coordinates_list):
+            x_min = int(coordinates["top_left"]["x"] * width)
+            y_min = int(coordinates["top_left"]["y"] * height)
+            x_max = int(coordinates["bottom_right"]["x"] * width)
+            y_max = int(coordinates["bottom_right"]["y"] * height)
+
+            # Same regions as calculate_average_pixel_value, resolved to
+            # explicit bounds the way NumPy slicing would resolve them
+            if x_min == x_max:
+                rows, columns = slice(y_min, y_max), slice(x_min, x_min + 1)
+            elif y_min == y_max:
+                rows, columns = slice(y_min, y_min + 1), slice(x_min, x_max)
+            else:
+                rows, columns = slice(y_min, y_max), slice(x_min, x_max)
+            row_start, row_stop, _ = rows.indices(height)
+            column_start, column_stop, _ = columns.indices(width)
+
+            if row_stop <= row_start or column_stop <= column_start:
+                continue
+            if row_stop - row_start == 1:
+                horizontal_lines.append((index, row_start, column_start, column_stop))
+            elif column_stop - column_start == 1:
+                vertical_lines.append((index, column_start, row_start, row_stop))
+            else:
+                region = pixels[row_start:row_stop, column_start:column_stop]
+                average_pixel_values[index] = list(
+                    np.round(np.mean(region, axis=(0, 1))).astype(int).tolist()
+                )
+
+        for lines, strips in (
+            (horizontal_lines, lambda positions: pixels[positions]),
+            (vertical_lines, lambda positions: pixels[:, positions].swapaxes(0, 1)),
+        ):
+            if not lines:
+                continue
+            line_array = np.array(lines)
+            line_pixels = strips(line_array[:, 1])
+            prefix_sums = np.zeros(
+                (len(lines), line_pixels.shape[1] + 1, 3), dtype=np.int64
+            )
+            np.cumsum(line_pixels, axis=1, out=prefix_sums[:, 1:])
+            line_indexes = np.arange(len(lines))
+            sums = (
+                prefix_sums[line_indexes, line_array[:, 3]]
+                - prefix_sums[line_indexes, line_array[:, 2]]
+            )
+            averages = np.round(
+                sums / (line_array[:, 3] - line_array[:, 2])[:, None]
+            ).astype(int)
+            for index, average in zip(line_array[:, 0].tolist(), averages.tolist()):
+                average_pixel_values[index] = average
+
+        return average_pixel_values
+
+
+class PageImageProvider(Sequence[bytes]):
+    """The JPEG page images of a PDF, rendered on first access.
+
+    A drop-in replacement for the list returned by convert_pdf_to_jpg_files:
+    indexing returns the same JPEG bytes, but a page is only rendered when it
+    is first requested. Rendered pages are kept in a bounded LRU cache, and
+    decoded images only for the pages of the current window, as a decoded
+    page is many times the size of its JPEG.
+
+    A missing page is rendered together with the following pages of its
+    window, so reading the pages in order costs one render call per window
+    while memory stays bounded by the cache size. Pages are rendered by the
+    extraction backend, poppler by default.
+
+    In raster mode pages are kept as PageRaster pixel buffers straight from
+    the renderer, and JPEG bytes are only encoded when a page is indexed.
+    Line colours sampled from rasters are free of JPEG artefacts, so they
+    can differ slightly from those sampled from JPEG pages.
+
+    With an ExtractionCache, rendered pages are also stored on disk under
+    cache_key and read back instead of being rendered again.
+    """
+
+    def __init__(
+        self,
+        pdf_bytes: bytes,
+        number_of_pages: Optional[int] = None,
+        cache_size: int = 8,
+        window_size: int = 1,
+        raster: bool = False,
+        extraction_cache: Optional[ExtractionCache] = None,
+        cache_key: Optional[str] = None,
+        instrumentation: Optional[Instrumentation] = None,
+        backend: Optional[ExtractionBackend] = None,
+    ) -> None:
+        self.pdf_bytes = pdf_bytes
+        self.instrumentation = get_instrumentation(instrumentation)
+        self.backend = get_backend(backend)
+        self.extraction_cache = extraction_cache
+        self.cache_key = cache_key
+        if extraction_cache is not None and cache_key is None:
+            self.cache_key = extraction_cache.get_key(
+                pdf_bytes, EXTRACTOR_VERSION, "pages", raster, self.backend.name
+            )
+        self.number_of_pages = number_of_pages
+        self.cache_size = max(cache_size, window_size)
+        self.window_size = window_size
+        self.raster = raster
+        self.jpg_cache: "OrderedDict[int, bytes]" = OrderedDict()
+        self.image_cache: "OrderedDict[int, Image.Image]" = OrderedDict()
+        self.raster_cache: "OrderedDict[int, PageRaster]" = OrderedDict()
+        # Pages kept by pin_pages, which unlike the caches go along when the
+        # provider is pickled
+        self.pinned_pages: Dict[int, bytes] = {}
+        self.rendered_pages = 0
+        self.lock = threading.RLock()
+
+    def __len__(self) -> int:
+        if self.number_of_pages is None:
+            self.number_of_pages = self.backend.get_number_of_pages(self.pdf_bytes)
+        return self.number_of_pages
+
+    def __getitem__(self, index: Any) -> Any:
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(len(self)))]
+        page_index = self.get_page_index(index)
+        if page_index in self.pinned_pages:
+            return self.pinned_pages[page_index]
+        with self.lock:
+            if page_index in self.jpg_cache:
+                self.jpg_cache.move_to_end(page_index)
+                return self.jpg_cache[page_index]
+            if self.raster:
+                jpg_bytes = self.get_raster(page_index).to_jpg_bytes()
+                self.add_to_cache(self.jpg_cache, page_index, jpg_bytes)
+                return jpg_bytes
+            cached_jpg_bytes = self.get_stored_page(page_index)
+            if cached_jpg_bytes is not None:
+                self.add_to_cache(self.jpg_cache, page_index, cached_jpg_bytes)
+                return cached_jpg_bytes
+            last_page_index = min(page_index + self.window_size, len(self)) - 1
+            for window_page_index, jpg_bytes in enumerate(
+                self.render_pages(page_index, last_page_index), start=page_index
+            ):
+                self.add_to_cache(self.jpg_cache, window_page_index, jpg_bytes)
+                self.store_page(window_page_index, jpg_bytes)
+            self.jpg_cache.move_to_end(page_index)
+            return self.jpg_cache[page_index]
+
+    def __getstate__(self) -> Dict[str, Any]:
+        # Caches and the lock stay with the process that filled them
+        state = self.__dict__.copy()
+        state["jpg_cache"] = OrderedDict()
+        state["image_cache"] = OrderedDict()
+        state["raster_cache"] = OrderedDict()
+        del state["lock"]
+        return state
+
+    def __setstate__(self, state: Dict[str, Any]) -> None:
+        self.__dict__.update(state)
+        self.lock = threading.RLock()
+
+    def pin_pages(self) -> None:
+        """Render every page and keep its JPEG bytes for the provider's lifetime.
+
+        Lets a document that is parsed several times, possibly in worker
+        processes, render each page only once.
+        """
+        for page_index in range(len(self)):
+            self.pinned_pages[page_index] = self[page_index]
+
+    def get_page_index(self, index: int) -> int:
+        number_of_pages = len(self)
+        page_index = index + number_of_pages if index < 0 else index
+        if not 0 <= page_index < number_of_pages:
+            raise IndexError(f"Page index {index} is out of range")
+        return page_index
+
+    def get_image(self, index: int) -> Image.Image:
+        """Get the decoded RGB image of a page."""
+        page_index = self.get_page_index(index)
+        with self.lock:
+            if page_index in self.image_cache:
+                self.image_cache.move_to_end(page_index)
+                return self.image_cache[page_index]
+            if self.raster:
+                image = self.get_raster(page_index).to_image()
+            else:
+                jpg_bytes = self[page_index]
+                with self.instrumentation.stage("decode"):
+                    image = Image.open(io.BytesIO(jpg_bytes)).convert("RGB")
+            self.add_to_cache(
+                self.image_cache, page_index, image, max_entries=self.window_size
+            )
+            return image
+
+    def get_raster(self, index: int) -> PageRaster:
+        """Get the pixels of a page, rendering its window if needed."""
+        page_index = self.get_page_index(index)
+        with self.lock:
+            if page_index in self.raster_cache:
+                self.raster_cache.move_to_end(page_index)
+                return self.raster_cache[page_index]
+            cached_raster_bytes = self.get_stored_page(page_index)
+            if cached_raster_bytes is not None:
+                raster = PageRaster.from_bytes(cached_raster_bytes)
+                self.add_to_cache(self.raster_cache, page_index, raster)
+                return raster
+            last_page_index = min(page_index + self.window_size, len(self)) - 1
+            for window_page_index, image in enumerate(
+                self.render_images(page_index, last_page_index), start=page_index
+            ):
+                raster = PageRaster.from_image(image)
+                self.add_to_cache(self.raster_cache, window_page_index, raster)
+                if self.extraction_cache is not None:
+                    self.store_page(window_page_index, raster.to_bytes())
+            self.raster_cache.move_to_end(page_index)
+            return self.raster_cache[page_index]
+
+    def get_stored_page(self, page_index: int) -> Optional[bytes]:
+        """Get a page rendered before from the extraction cache."""
+        if self.extraction_cache is None or self.cache_key is None:
+            return None
+        return self.extraction_cache.get_page(self.cache_key, page_index)
+
+    def store_page(self, page_index: int, value: bytes) -> None:
+        if self.extraction_cache is not None and self.cache_key is not None:
+            self.extraction_cache.set_page(self.cache_key, page_index, value)
+
+    def render_pages(
+        self, first_page_index: int, last_page_index: int
+    ) -> Iterator[bytes]:
+        """Render a range of pages, inclusive, yielding JPEG bytes."""
+        for image in self.render_images(first_page_index, last_page_index):
+            with self.instrumentation.stage("encode"):
+                jpg_bytes = ImageExtractor.convert_image_to_jpg_bytes(image)
+            yield jpg_bytes
+
+    def render_images(
+        self, first_page_index: int, last_page_index: int
+    ) -> List[Image.Image]:
+        """Render a range of pages, inclusive, of at most one window."""
+        with self.instrumentation.stage("render"):
+            images = list(
+                ImageExtractor(self.pdf_bytes, self.backend).iter_pdf_images(
+                    self.window_size, first_page_index + 1, last_page_index + 1
+                )
+            )
+        self.rendered_pages += len(images)
+        self.instrumentation.increment("pages_rendered", len(images))
+        return images
+
+    def add_to_cache(
+        self,
+        cache: "OrderedDict[int, Any]",
+        page_index: int,
+        value: Any,
+        max_entries: Optional[int] = None,
+    ) -> None:
+        cache[page_index] = value
+        while len(cache) > (max_entries or self.cache_size):
+            cache.popitem(last=False)
+
 
 class TextExtractor:
-    def __init__(self, coordinate_utils):
+    ocr_modes = ("cell", "page")
+
+    def __init__(
+        self,
+        coordinate_utils,
+        ocr_mode: str = "cell",
+        ocr_executor: Optional[OCRExecutor] = None,
+        ocr_cache: Optional[OCRCache] = None,
+        ocr_config: str = "",
+        instrumentation: Optional[Instrumentation] = None,
+    ):
+        """
+        Args:
+            coordinate_utils: Shared CoordinateUtils holding the page indexes.
+            ocr_mode: "cell" runs tesseract on the crop of every field and
+                cell. "page" runs tesseract once per page and answers every
+                field and cell from the recognised words.
+            ocr_executor: Runs the crops of get_texts_from_ocr concurrently.
+            ocr_cache: Reuses the OCR results of crops seen before, in this
+                document or any other parsed with the same cache.
+            ocr_config: Extra tesseract configuration.
+            instrumentation: Records OCR, regex and bounding box stages.
+        """
+        if ocr_mode not in self.ocr_modes:
+            raise ValueError(f"Invalid OCR mode: {ocr_mode}")
         self.coordinate_utils = coordinate_utils
+        self.ocr_mode = ocr_mode
+        self.ocr_executor = ocr_executor
+        self.ocr_cache = ocr_cache
+        self.ocr_config = ocr_config
+        self.instrumentation = get_instrumentation(instrumentation)
+        self.image_hasher = ImageHasher()
+        self.page_ocr = PageOCR(
+            coordinate_utils,
+            config=ocr_config,
+            image_hasher=self.image_hasher,
+            instrumentation=self.instrumentation,
+        )
 
     def get_text_from_items(self, items: List[Dict[str, Any]]) -> str:
         return " ".join([item["text"] for item in items])
 
     def get_text_from_ocr(
-        self, jpg_bytes_page: Union[bytes, Image.Image], coordinates: Dict[str, Any]
+        self,
+        jpg_bytes_page: Union[bytes, Image.Image, PageRaster],
+        coordinates: Dict[str, Any],
     ) -> str:
+        if self.ocr_mode == "page":
+            return self.page_ocr.get_text(jpg_bytes_page, coordinates)
         image_extractor = ImageExtractor(jpg_bytes_page)
-        return image_extractor.extract_text_from_coordinates(coordinates)
+        if self.ocr_cache is None:
+            with self.instrumentation.stage("ocr"):
+                text = image_extractor.extract_text_from_coordinates(
+                    coordinates, self.ocr_config
+                )
+            self.instrumentation.increment("ocr_calls")
+            return text
+
+        image = (
+            jpg_bytes_page
+            if isinstance(jpg_bytes_page, PageRaster)
+            else image_extractor.get_image()
+        )
+        image_digest = self.image_hasher.get_digest(jpg_bytes_page)
+        crop_box = ImageExtractor.get_crop_box(image, coordinates)
+        cached_text = self.ocr_cache.get(image_digest, crop_box, self.ocr_config)
+        if cached_text is not None:
+            self.instrumentation.increment("ocr_cache_hits")
+            return cached_text
+
+        with self.instrumentation.stage("ocr"):
+            text = ImageExtractor(image).extract_text_from_coordinates(
+                coordinates, self.ocr_config
+            )
+        self.instrumentation.increment("ocr_calls")
+        self.instrumentation.increment("ocr_cache_misses")
+        self.ocr_cache.set(image_digest, crop_box, text, self.ocr_config)
+        return text
+
+    def get_texts_from_ocr(
+        self,
+        jpg_bytes_page: Union[bytes, Image.Image, PageRaster],
+        coordinates_list: List[Dict[str, Any]],
+    ) -> List[str]:
+        """OCR several regions of a page, concurrently when there is an executor."""
+        if self.ocr_executor is None:
+            return [
+                self.get_text_from_ocr(jpg_bytes_page, coordinates)
+                for coordinates in coordinates_list
+            ]
+        return self.ocr_executor.map(
+            lambda coordinates: self.get_text_from_ocr(jpg_bytes_page, coordinates),
+            coordinates_list,
+        )
 
     def get_items_in_bounding_box(
         self,
@@ -227,45 +1002,37 @@ class TextExtractor:
         page_content: List[Dict[str, Any]],
         coordinates: Optional[Dict[str, Dict[str, float]]],
         extraction_method: str,
-        jpg_bytes_page: Union[bytes, Image.Image],
+        jpg_bytes_page: Union[bytes, Image.Image, PageRaster, None],
         search_type: Optional[str] = None,
-        regex: Optional[str] = None,
+        regex: Optional[Union[str, Pattern[str]]] = None,
     ) -> str:
         """Extract text using either coordinates, OCR, or regex"""
         if search_type == "regex" and regex:
-            try:
-                # Join all text from the page with spaces
-                full_page_text = " ".join([item["text"] for item in page_content])
-
-                # Use regex to find matches
-                matches = re.findall(regex, full_page_text)
-
-                # Handle different match types
-                if matches:
-                    if isinstance(matches[0], tuple):
-                        # If regex has capture groups, return first group
-                        return matches[0][0]
-                    else:
-                        # If no capture groups, return full match
-                        return matches[0]
-                return ""
-
-            except re.error as e:
-                print(f"Invalid regex pattern: {regex}")
-                print(f"Error: {str(e)}")
-                return ""
-            except Exception as e:
-                print(f"Error processing regex: {str(e)}")
-                return ""
+            self.instrumentation.increment("regex_searches")
+            with self.instrumentation.stage("regex"):
+                try:
+                    text_index = self.coordinate_utils.get_text_index(page_content)
+                    # The first match, or its first group if the regex has any
+                    return text_index.get_first_match(regex)
+
+                except re.error as e:
+                    print(f"Invalid regex pattern: {regex}")
+                    print(f"Error: {str(e)}")
+                    return ""
+                except Exception as e:
+                    print(f"Error processing regex: {str(e)}")
+                    return ""
 
         if coordinates is None:
             return ""
 
         if extraction_method == "extraction":
-            items_within_coordinates = self.get_items_in_bounding_box(
-                page_content, coordinates
-            )
-            return self.get_text_from_items(items_within_coordinates)
+            with self.instrumentation.stage("bounding_box"):
+                return self.coordinate_utils.get_text_in_bounding_box(
+                    page_content, coordinates
+                )
         elif extraction_method == "ocr":
+            if jpg_bytes_page is None:
+                raise ValueError("OCR extraction requires the page image")
             return self.get_text_from_ocr(jpg_bytes_page, coordinates)
         return ""
@@ -0,0 +1,218 @@
+import math
+import re
+from collections import defaultdict
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple, Union
+
+from pdf_parser.page_data import PageWords
+from pdf_parser.templates import CompiledTemplate
+
+# Tokens with digits are account numbers, dates and amounts, which change
+# from one statement to the next
+VARIABLE_TOKEN_PATTERN = re.compile(r"\d")
+PUNCTUATION_PATTERN = re.compile(r"[^\w]+")
+
+
+class FingerprintIndex:
+    """Inverted index from first-page anchor tokens to templates.
+
+    Each template is fingerprinted by anchor tokens and the decimal
+    coordinates of their top left corner on the first page, declared under
+    "fingerprint" in the template or derived from a sample document. A
+    document's first-page words are looked up in the index, and a template
+    scores the IDF weight of its anchors found within its position tolerance,
+    as a fraction of the weight of all its anchors.
+    """
+
+    def __init__(self, default_tolerance: float = 0.02) -> None:
+        self.default_tolerance = default_tolerance
+        self.templates: Dict[str, Union[Dict[str, Any], CompiledTemplate]] = {}
+        self.anchors: Dict[str, List[Dict[str, Any]]] = {}
+        self.tolerances: Dict[str, float] = {}
+        # token -> [(template key, anchor index, x, y)]
+        self.postings: Dict[str, List[Tuple[str, int, float, float]]] = defaultdict(
+            list
+        )
+        self.weights: Dict[str, float] = {}
+
+    @staticmethod
+    def normalize_token(text: str) -> str:
+        return PUNCTUATION_PATTERN.sub("", text).lower()
+
+    @staticmethod
+    def get_template_key(template: Union[Dict[str, Any], CompiledTemplate]) -> str:
+        metadata = template["metadata"]
+        return f"{metadata['template_name']}:{metadata['version']}"
+
+    @staticmethod
+    def get_first_page_words(
+        pdf_data: Dict[str, Any]
+    ) -> List[Tuple[str, float, float]]:
+        """Get the (text, x, y) of the words on the first page of a document."""
+        if not pdf_data["pages"]:
+            return []
+        content = pdf_data["pages"][0]["content"]
+        if isinstance(content, PageWords):
+            return list(
+                zip(
+                    content.texts.tolist(),
+                    content.decimal_coordinates[:, 0].tolist(),
+                    content.decimal_coordinates[:, 1].tolist(),
+                )
+            )
+        return [
+            (
+                item["text"],
+                item["bounding_box"]["decimal_coordinates"]["top_left"]["x"],
+                item["bounding_box"]["decimal_coordinates"]["top_left"]["y"],
+            )
+            for item in content
+        ]
+
+    @staticmethod
+    def derive_anchors(
+        pdf_data: Dict[str, Any], max_anchors: int = 20
+    ) -> List[Dict[str, Any]]:
+        """Pick the stable words of a sample document's first page as anchors.
+
+        Words containing digits, single characters and words that occur more
+        than once on the page are skipped; the remaining words closest to
+        the top of the page, where headers live, are used.
+        """
+        words = FingerprintIndex.get_first_page_words(pdf_data)
+        counts: Dict[str, int] = defaultdict(int)
+        for text, _, _ in words:
+            counts[FingerprintIndex.normalize_token(text)] += 1
+
+        anchors = []
+        for text, x, y in sorted(words, key=lambda word: (word[2], word[1])):
+            token = FingerprintIndex.normalize_token(text)
+            if len(token) < 2 or counts[token] > 1:
+                continue
+            if VARIABLE_TOKEN_PATTERN.search(token):
+                continue
+            anchors.append({"text": text, "x": x, "y": y})
+            if len(anchors) == max_anchors:
+                break
+        return anchors
+
+    def add_template(
+        self,
+        template: Union[Dict[str, Any], CompiledTemplate],
+        sample_pdf_data: Optional[Dict[str, Any]] = None,
+    ) -> None:
+        """Index a template by its declared anchors, or ones derived from a sample."""
+        self.index_template(template, sample_pdf_data)
+        self.update_weights()
+
+    def add_templates(
+        self, templates: Iterable[Union[Dict[str, Any], CompiledTemplate]]
+    ) -> None:
+        """Index templates with declared anchors, updating the weights once."""
+        for template in templates:
+            self.index_template(template)
+        self.update_weights()
+
+    def index_template(
+        self,
+        template: Union[Dict[str, Any], CompiledTemplate],
+        sample_pdf_data: Optional[Dict[str, Any]] = None,
+    ) -> None:
+        """Add a template's postings without updating the token weights."""
+        template_key = self.get_template_key(template)
+        fingerprint = template.get("fingerprint")
+        if fingerprint is not None:
+            anchors = fingerprint["anchors"]
+            tolerance = fingerprint.get("tolerance", self.default_tolerance)
+        elif sample_pdf_data is not None:
+            anchors = self.derive_anchors(sample_pdf_data)
+            tolerance = self.default_tolerance
+        else:
+            raise ValueError(
+                f"Template '{template_key}' has no fingerprint and no sample document"
+            )
+
+        if template_key in self.templates:
+            self.unindex_template(template_key)
+        self.templates[template_key] = template
+        self.anchors[template_key] = anchors
+        self.tolerances[template_key] = tolerance
+        for anchor_index, anchor in enumerate(anchors):
+            token = self.normalize_token(anchor["text"])
+            # Punctuation-only anchors normalize to nothing and can't be matched
+            if token:
+                self.postings[token].append(
+                    (template_key, anchor_index, anchor["x"], anchor["y"])
+                )
+
+    def remove_template(self, template_key: str) -> None:
+        self.unindex_template(template_key)
+        self.update_weights()
+
+    def unindex_template(self, template_key: str) -> None:
+        """Remove a template's postings without updating the token weights."""
+        del self.templates[template_key]
+        del self.anchors[template_key]
+        del self.tolerances[template_key]
+        for token in list(self.postings):
+            self.postings[token] = [
+                posting
+                for posting in self.postings[token]
+                if posting[0] != template_key
+            ]
+            if not self.postings[token]:
+                del self.postings[token]
+
+    def update_weights(self) -> None:
+        """Weight each token by its inverse document frequency over templates."""
+        number_of_templates = len(self.templates)
+        self.weights = {
+            token: math.log(
+                1 + number_of_templates / len({posting[0] for posting in postings})
+            )
+            for token, postings in self.postings.items()
+        }
+
+    def match(
+        self, pdf_data: Dict[str, Any], top_k: Optional[int] = None
+    ) -> List[Tuple[str, float]]:
+        """Rank the indexed templates for a document, best first.
+
+        Returns (template key, score) pairs for templates with a positive
+        score, where the score is between 0 and 1.
+        """
+        matched: Dict[str, Set[int]] = defaultdict(set)
+        for text, x, y in self.get_first_page_words(pdf_data):
+            token = self.normalize_token(text)
+            if not token:
+                continue
+            for template_key, anchor_index, anchor_x, anchor_y in self.postings.get(
+                token, ()
+            ):
+                tolerance = self.tolerances[template_key]
+                if abs(x - anchor_x) <= tolerance and abs(y - anchor_y) <= tolerance:
+                    matched[template_key].add(anchor_index)
+
+        scores = []
+        for template_key, anchor_indexes in matched.items():
+            anchors = self.anchors[template_key]
+            total_weight = sum(
+                self.weights.get(self.normalize_token(anchor["text"]), 0.0)
+                for anchor in anchors
+            )
+            matched_weight = sum(
+                self.weights[self.normalize_token(anchors[anchor_index]["text"])]
+                for anchor_index in anchor_indexes
+            )
+            scores.append((template_key, matched_weight / total_weight))
+
+        scores.sort(key=lambda score: (-score[1], score[0]))
+        return scores[:top_k] if top_k is not None else scores
+
+    def get_best_template(
+        self, pdf_data: Dict[str, Any], min_score: float = 0.5
+    ) -> Optional[Union[Dict[str, Any], CompiledTemplate]]:
+        """Get the best matching template, or None if none scores min_score."""
+        candidates = self.match(pdf_data, top_k=1)
+        if not candidates or candidates[0][1] < min_score:
+            return None
+        return self.templates[candidates[0][0]]
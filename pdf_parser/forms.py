@@ -1,6 +1,7 @@
-from typing import Dict, List, Any
+from typing import Dict, Any, Mapping, Sequence
 from pdf_parser.coordinate_utils import CoordinateUtils
-from pdf_parser.extractors import TextExtractor
+from pdf_parser.extractors import ImageExtractor, TextExtractor
+from pdf_parser.templates import CompiledTemplate
 
 
 class FormProcessor:
@@ -13,17 +14,24 @@ class FormProcessor:
         form_rule_id: str,
         page_index: int,
         pdf_data: Dict[str, Any],
-        template: Dict[str, Any],
-        jpg_bytes: List[bytes],
+        template: Mapping[str, Any],
+        jpg_bytes: Sequence[bytes],
     ) -> Dict[str, str]:
         form_rule = self.coordinate_utils.get_rule_from_id(form_rule_id, template)
         config = form_rule["config"]
         coordinates = config.get("coordinates")
         page_content = pdf_data["pages"][page_index]["content"]
         extraction_method = template["extraction_method"]
-        jpg_bytes_page = jpg_bytes[page_index]
+        # Page images are only needed, and only rendered, for OCR
+        jpg_bytes_page = (
+            ImageExtractor.get_page_image(jpg_bytes, page_index)
+            if extraction_method == "ocr"
+            else None
+        )
         search_type = config.get("search_type")
         regex = config.get("regex")
+        if isinstance(template, CompiledTemplate):
+            regex = template.get_regex(form_rule_id)
 
         return {
             config["field_name"]: self.text_extractor.get_text_from_page(
@@ -0,0 +1,171 @@
+import json
+import os
+import threading
+import time
+from collections import defaultdict
+from contextlib import contextmanager, nullcontext
+from typing import Any, Callable, ContextManager, Dict, Iterator, List, Optional
+
+Sink = Callable[["Instrumentation"], None]
+
+
+class Instrumentation:
+    """Stage timers and counters for extracting and parsing documents.
+
+    Pass one instance to DataExtractor, Parser.parse_pdf and friends to see
+    where the time of a document goes. Stage times are summed per stage name;
+    stages may nest, so nested stage times are also part of their parent's.
+    Sinks are called with this instance on `flush`, which Parser.parse_pdf
+    does once the document is parsed.
+
+    Each stage call is only kept as an event when a sink sets records_events,
+    like ChromeTraceSink, and the events are cleared on every flush, so an
+    instance shared across many documents does not grow.
+    """
+
+    enabled = True
+
+    def __init__(self, sinks: Optional[List[Sink]] = None) -> None:
+        self.sinks: List[Sink] = []
+        self.records_events = False
+        self.timings: Dict[str, float] = defaultdict(float)
+        self.stage_calls: Dict[str, int] = defaultdict(int)
+        self.counters: Dict[str, int] = defaultdict(int)
+        # (stage name, start, duration, thread id) for trace sinks
+        self.events: List[tuple] = []
+        self.start_time = time.perf_counter()
+        self.lock = threading.Lock()
+        for sink in sinks or []:
+            self.add_sink(sink)
+
+    @contextmanager
+    def stage(self, name: str) -> Iterator[None]:
+        start_time = time.perf_counter()
+        try:
+            yield
+        finally:
+            duration = time.perf_counter() - start_time
+            with self.lock:
+                self.timings[name] += duration
+                self.stage_calls[name] += 1
+                if self.records_events:
+                    self.events.append(
+                        (name, start_time, duration, threading.get_ident())
+                    )
+
+    def increment(self, name: str, amount: int = 1) -> None:
+        with self.lock:
+            self.counters[name] += amount
+
+    def get_metrics(self) -> Dict[str, Any]:
+        """Get the stage timings, in seconds, and counters as plain dictionaries."""
+        with self.lock:
+            return {
+                "timings": {
+                    name: round(seconds, 6) for name, seconds in self.timings.items()
+                },
+                "stage_calls": dict(self.stage_calls),
+                "counters": dict(self.counters),
+            }
+
+    def add_sink(self, sink: Sink) -> None:
+        self.sinks.append(sink)
+        self.records_events = self.records_events or getattr(
+            sink, "records_events", False
+        )
+
+    def flush(self) -> None:
+        for sink in self.sinks:
+            sink(self)
+        with self.lock:
+            self.events.clear()
+
+
+class NullInstrumentation(Instrumentation):
+    """Instrumentation that records nothing, used when none is given."""
+
+    enabled = False
+
+    def __init__(self) -> None:
+        super().__init__()
+        self.null_stage = nullcontext()
+
+    def stage(self, name: str) -> ContextManager[None]:  # type: ignore[override]
+        return self.null_stage
+
+    def increment(self, name: str, amount: int = 1) -> None:
+        pass
+
+    def flush(self) -> None:
+        pass
+
+    def __reduce__(self) -> Any:
+        # Unpickles to a fresh no-op instance, e.g. in extraction workers
+        return (NullInstrumentation, ())
+
+
+NULL_INSTRUMENTATION = NullInstrumentation()
+
+
+def get_instrumentation(
+    instrumentation: Optional[Instrumentation],
+) -> Instrumentation:
+    return instrumentation if instrumentation is not None else NULL_INSTRUMENTATION
+
+
+class CallbackSink:
+    """Sink that passes the metrics dictionary to a callback."""
+
+    def __init__(self, callback: Callable[[Dict[str, Any]], None]) -> None:
+        self.callback = callback
+
+    def __call__(self, instrumentation: Instrumentation) -> None:
+        self.callback(instrumentation.get_metrics())
+
+
+class ChromeTraceSink:
+    """Sink that writes the stages as a Chrome trace JSON file.
+
+    Open the file in chrome://tracing or https://ui.perfetto.dev. Each stage
+    since the previous flush is a complete event on the thread that ran it,
+    and the counters are written as counter events at the end of the trace.
+    """
+
+    records_events = True
+
+    def __init__(self, path: str) -> None:
+        self.path = path
+
+    def __call__(self, instrumentation: Instrumentation) -> None:
+        process_id = os.getpid()
+        with instrumentation.lock:
+            events = list(instrumentation.events)
+            counters = dict(instrumentation.counters)
+
+        trace_events: List[Dict[str, Any]] = [
+            {
+                "name": name,
+                "ph": "X",
+                "ts": (start_time - instrumentation.start_time) * 1e6,
+                "dur": duration * 1e6,
+                "pid": process_id,
+                "tid": thread_id,
+            }
+            for name, start_time, duration, thread_id in events
+        ]
+        end_time = max(
+            (event["ts"] + event["dur"] for event in trace_events), default=0.0
+        )
+        trace_events.extend(
+            {
+                "name": name,
+                "ph": "C",
+                "ts": end_time,
+                "pid": process_id,
+                "args": {name: value},
+            }
+            for name, value in counters.items()
+        )
+
+        with open(self.path, "w") as trace_file:
+            json.dump({"traceEvents": trace_events}, trace_file)
@@ -1,17 +1,46 @@
+import hashlib
 import io
-from typing import Dict, Any
+import threading
+import weakref
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import (
+    Any,
+    Callable,
+    Dict,
+    Iterable,
+    List,
+    Optional,
+    Tuple,
+    TypeVar,
+    Union,
+)
+
+import numpy as np
 import pytesseract  # type: ignore
 from PIL import Image
 
+from pdf_parser.coordinate_utils import CoordinateUtils
+from pdf_parser.instrumentation import Instrumentation, get_instrumentation
+from pdf_parser.page_data import PageRaster, PageWords
+
+T = TypeVar("T")
+
 
 class ImageExtractor:
-    def __init__(self, jpg_bytes: bytes, coordinates: Dict[str, Any]) -> None:
+    def __init__(
+        self, jpg_bytes: Union[bytes, PageRaster], coordinates: Dict[str, Any]
+    ) -> None:
         self.jpg_bytes = jpg_bytes
         self.coordinates = coordinates
 
+    def get_image(self) -> Image.Image:
+        if isinstance(self.jpg_bytes, PageRaster):
+            return self.jpg_bytes.to_image()
+        return Image.open(io.BytesIO(self.jpg_bytes))
+
     def extract_text(self) -> str:
         """Extract text from an image using OCR."""
-        image = Image.open(io.BytesIO(self.jpg_bytes))
+        image = self.get_image()
         x_min = int(self.coordinates["top_left"]["x"] * image.width)
         y_min = int(self.coordinates["top_left"]["y"] * image.height)
         x_max = int(self.coordinates["bottom_right"]["x"] * image.width)
@@ -21,10 +50,161 @@ class ImageExtractor:
 
     def extract_text_from_coordinates(self, coordinates: Dict[str, Any]) -> str:
         """Extract text from specific coordinates in an image using OCR."""
-        image = Image.open(io.BytesIO(self.jpg_bytes))
+        image = self.get_image()
         x_min = int(coordinates["top_left"]["x"] * image.width)
         y_min = int(coordinates["top_left"]["y"] * image.height)
         x_max = int(coordinates["bottom_right"]["x"] * image.width)
         y_max = int(coordinates["bottom_right"]["y"] * image.height)
         cropped_image = image.crop((x_min, y_min, x_max, y_max))
         return pytesseract.image_to_string(cropped_image).strip()
+
+
+class ImageHasher:
+    """Content hashes of page images, computing each decoded image's hash once."""
+
+    def __init__(self) -> None:
+        self.digests: Dict[int, Tuple[Callable[[], Any], str]] = {}
+
+    def get_digest(self, page_image: Union[bytes, Image.Image, PageRaster]) -> str:
+        if isinstance(page_image, bytes):
+            return hashlib.sha256(page_image).hexdigest()
+
+        cached = self.digests.get(id(page_image))
+        if cached is not None and cached[0]() is page_image:
+            return cached[1]
+
+        if isinstance(page_image, PageRaster):
+            # Hash the pixel buffer in place, without copying it to bytes
+            hasher = hashlib.sha256(f"RGB{page_image.size}".encode())
+            hasher.update(page_image.pixels.data.cast("B"))
+            digest = hasher.hexdigest()
+        else:
+            digest = hashlib.sha256(
+                f"{page_image.mode}{page_image.size}".encode() + page_image.tobytes()
+            ).hexdigest()
+        self.digests[id(page_image)] = (weakref.ref(page_image), digest)
+        return digest
+
+
+class PageOCR:
+    """OCR each page image once and answer bounding box queries from its words.
+
+    The words tesseract finds on a page are stored with decimal coordinates
+    in a PageWords, so fields and table cells are resolved with the same
+    containment rules as text-layer extraction.
+    """
+
+    def __init__(
+        self,
+        coordinate_utils: CoordinateUtils,
+        config: str = "",
+        image_hasher: Optional[ImageHasher] = None,
+        instrumentation: Optional[Instrumentation] = None,
+    ) -> None:
+        self.coordinate_utils = coordinate_utils
+        self.config = config
+        self.image_hasher = image_hasher or ImageHasher()
+        self.instrumentation = get_instrumentation(instrumentation)
+        self.page_words: Dict[str, PageWords] = {}
+        self.lock = threading.Lock()
+        self.page_locks: Dict[str, threading.Lock] = {}
+
+    def extract_page_words(
+        self, page_image: Union[bytes, Image.Image, PageRaster]
+    ) -> PageWords:
+        """Run tesseract on a whole page and collect its words."""
+        if isinstance(page_image, bytes):
+            image = Image.open(io.BytesIO(page_image)).convert("RGB")
+        elif isinstance(page_image, PageRaster):
+            image = page_image.to_image()
+        else:
+            image = page_image
+
+        with self.instrumentation.stage("ocr"):
+            data = pytesseract.image_to_data(
+                image, config=self.config, output_type=pytesseract.Output.DICT
+            )
+        self.instrumentation.increment("ocr_calls")
+
+        texts = []
+        coordinates = []
+        for text, left, top, width, height in zip(
+            data["text"], data["left"], data["top"], data["width"], data["height"]
+        ):
+            text = str(text).strip()
+            if not text:
+                continue
+            texts.append(text)
+            coordinates.append((left, top, left + width, top + height))
+
+        coordinates_array = np.array(coordinates, dtype=np.float64).reshape(-1, 4)
+        decimal_coordinates = np.round(
+            coordinates_array / [image.width, image.height, image.width, image.height],
+            6,
+        )
+        return PageWords(texts, coordinates_array, decimal_coordinates)
+
+    def get_page_words(
+        self, page_image: Union[bytes, Image.Image, PageRaster]
+    ) -> PageWords:
+        digest = self.image_hasher.get_digest(page_image)
+        with self.lock:
+            page_lock = self.page_locks.setdefault(digest, threading.Lock())
+        # Concurrent requests for the same page wait for a single OCR run
+        with page_lock:
+            if digest not in self.page_words:
+                self.page_words[digest] = self.extract_page_words(page_image)
+        return self.page_words[digest]
+
+    def get_text(
+        self,
+        page_image: Union[bytes, Image.Image, PageRaster],
+        coordinates: Dict[str, Dict[str, float]],
+    ) -> str:
+        return self.coordinate_utils.get_text_in_bounding_box(
+            self.get_page_words(page_image), coordinates
+        )
+
+
+class OCRExecutor:
+    """Thread pool that runs the OCR requests of a document concurrently.
+
+    pytesseract runs tesseract in a subprocess, so threads are enough to keep
+    several OCR runs going at once. Results are returned in request order,
+    and `cancel` drops the requests that have not started yet.
+    """
+
+    def __init__(self, max_workers: int = 4) -> None:
+        self.max_workers = max_workers
+        self.executor = ThreadPoolExecutor(
+            max_workers=max_workers, thread_name_prefix="ocr"
+        )
+
+    def submit(self, function: Callable[..., T], *args: Any) -> "Future[T]":
+        return self.executor.submit(function, *args)
+
+    def map(self, function: Callable[[Any], T], items: Iterable[Any]) -> List[T]:
+        """Apply a function to every item concurrently, keeping the item order."""
+        futures = [self.executor.submit(function, item) for item in items]
+        try:
+            return [future.result() for future in futures]
+        except BaseException:
+            for future in futures:
+                future.cancel()
+            raise
+
+    def cancel(self) -> None:
+        """Cancel all requests that have not started and stop the workers."""
+        self.executor.shutdown(wait=False, cancel_futures=True)
+
+    def shutdown(self) -> None:
+        self.executor.shutdown(wait=True)
+
+    def __enter__(self) -> "OCRExecutor":
+        return self
+
+    def __exit__(self, exc_type: Any, exc_value: Any, traceback: Any) -> None:
+        if exc_type is not None:
+            self.cancel()
+        else:
+            self.shutdown()
@@ -0,0 +1,97 @@
+from typing import IO, Any, Dict, Iterator, List
+
+from pydantic_core import to_json
+
+from pdf_parser.pydantic_models import Document
+
+
+class OutputWriter:
+    """Write parse output as JSON directly from the parser's dictionaries.
+
+    The output matches Document(**output).model_dump_json() byte for byte.
+    It is encoded with pydantic's own JSON serializer, so strings and numbers
+    are written the same way, but without building and validating the
+    Document models, and can be streamed in chunks so the JSON of a large
+    table is never held as one string. Validation is optional.
+    """
+
+    rows_per_chunk = 1000
+
+    @staticmethod
+    def encode(value: Any) -> str:
+        return to_json(value, inf_nan_mode="null").decode()
+
+    @staticmethod
+    def encode_metadata(metadata: Dict[str, Any]) -> str:
+        # Fields in the order of the Metadata model; metrics only when present
+        fields = {
+            "document_id": metadata["document_id"],
+            "parsed_at": metadata["parsed_at"],
+            "number_of_pages": metadata["number_of_pages"],
+        }
+        if metadata.get("metrics") is not None:
+            fields["metrics"] = metadata["metrics"]
+        return OutputWriter.encode(fields)
+
+    @staticmethod
+    def iter_rows(rows: List[Dict[str, Any]]) -> Iterator[str]:
+        """Encode a list of rows in chunks of rows_per_chunk rows."""
+        if len(rows) <= OutputWriter.rows_per_chunk:
+            yield OutputWriter.encode(rows)
+            return
+        yield "["
+        for start in range(0, len(rows), OutputWriter.rows_per_chunk):
+            chunk = OutputWriter.encode(
+                rows[start : start + OutputWriter.rows_per_chunk]
+            )
+            yield chunk[1:-1] if start == 0 else "," + chunk[1:-1]
+        yield "]"
+
+    @staticmethod
+    def iter_page(page: Dict[str, Any]) -> Iterator[str]:
+        yield '{"forms":'
+        if page.get("forms") is None:
+            yield "null"
+        else:
+            yield from OutputWriter.iter_rows(page["forms"])
+        yield ',"tables":'
+        if page.get("tables") is None:
+            yield "null}"
+            return
+        yield "["
+        for table_index, table in enumerate(page["tables"]):
+            yield '{"data":' if table_index == 0 else ',{"data":'
+            yield from OutputWriter.iter_rows(table["data"])
+            yield "}"
+        yield "]}"
+
+    @staticmethod
+    def iter_json(output: Dict[str, Any], validate: bool = False) -> Iterator[str]:
+        """Encode the output of a parse as chunks of JSON text.
+
+        With validate, the output is first validated against the Document
+        model, raising pydantic's ValidationError if it does not conform.
+        """
+        if validate:
+            Document(**output)
+
+        yield '{"metadata":'
+        yield OutputWriter.encode_metadata(output["metadata"])
+        yield ',"pages":['
+        for page_index, page in enumerate(output["pages"]):
+            if page_index:
+                yield ","
+            yield from OutputWriter.iter_page(page)
+        yield "]}"
+
+    @staticmethod
+    def to_json(output: Dict[str, Any], validate: bool = False) -> str:
+        return "".join(OutputWriter.iter_json(output, validate))
+
+    @staticmethod
+    def write_json(
+        output: Dict[str, Any], output_file: IO[str], validate: bool = False
+    ) -> None:
+        """Stream the JSON of the output to a text file."""
+        for chunk in OutputWriter.iter_json(output, validate):
+            output_file.write(chunk)
@@ -0,0 +1,323 @@
+import io
+import sys
+from typing import (
+    Any,
+    Dict,
+    Iterator,
+    List,
+    Mapping,
+    Optional,
+    Sequence,
+    Tuple,
+    Union,
+)
+
+import numpy as np
+from PIL import Image
+
+
+def get_box_dict(x0: float, y0: float, x1: float, y1: float) -> Dict[str, Any]:
+    return {
+        "top_left": {"x": x0, "y": y0},
+        "bottom_right": {"x": x1, "y": y1},
+    }
+
+
+class PageWords(Sequence[Dict[str, Any]]):
+    """Columnar storage for the words of a page.
+
+    Coordinates are held in (n, 4) arrays ordered x0, y0, x1, y1: absolute
+    coordinates as float32, decimal coordinates as float64 so bounding box
+    comparisons match the dictionary representation exactly. Texts are
+    interned, so repeated tokens share one string. Indexing or iterating
+    yields the same dictionaries DataExtractor.extract_page_text_data builds,
+    created on demand.
+    """
+
+    def __init__(
+        self,
+        texts: Sequence[str],
+        coordinates: np.ndarray,
+        decimal_coordinates: np.ndarray,
+    ) -> None:
+        self.texts = np.array([sys.intern(text) for text in texts], dtype=object)
+        self.coordinates = np.ascontiguousarray(coordinates, dtype=np.float32).reshape(
+            -1, 4
+        )
+        self.decimal_coordinates = np.ascontiguousarray(
+            decimal_coordinates, dtype=np.float64
+        ).reshape(-1, 4)
+        self.word_index: Optional[Any] = None
+        self.text_index: Optional[Any] = None
+
+    @classmethod
+    def from_pdfplumber_words(
+        cls, words: List[Dict[str, Any]], width: float, height: float
+    ) -> "PageWords":
+        """Build from pdfplumber words, rounding like extract_page_text_data."""
+        texts = []
+        coordinates = []
+        decimal_coordinates = []
+        for element in words:
+            x0, y0, x1, y1 = (
+                round(element["x0"], 2),
+                round(element["top"], 2),
+                round(element["x1"], 2),
+                round(element["bottom"], 2),
+            )
+            texts.append(element["text"])
+            coordinates.append((x0, y0, x1, y1))
+            decimal_coordinates.append(
+                (
+                    round((x0 / width), 6),
+                    round((y0 / height), 6),
+                    round((x1 / width), 6),
+                    round((y1 / height), 6),
+                )
+            )
+        return cls(texts, np.array(coordinates), np.array(decimal_coordinates))
+
+    @classmethod
+    def from_items(cls, items: Sequence[Dict[str, Any]]) -> "PageWords":
+        """Build from the dictionary representation of a page's words."""
+        texts = []
+        coordinates: List[Tuple[float, float, float, float]] = []
+        decimal_coordinates: List[Tuple[float, float, float, float]] = []
+        for item in items:
+            texts.append(item["text"])
+            for values, key in (
+                (coordinates, "coordinates"),
+                (decimal_coordinates, "decimal_coordinates"),
+            ):
+                box = item["bounding_box"][key]
+                values.append(
+                    (
+                        box["top_left"]["x"],
+                        box["top_left"]["y"],
+                        box["bottom_right"]["x"],
+                        box["bottom_right"]["y"],
+                    )
+                )
+        return cls(texts, np.array(coordinates), np.array(decimal_coordinates))
+
+    def __len__(self) -> int:
+        return len(self.texts)
+
+    def __getitem__(self, index: Any) -> Any:
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(len(self)))]
+        coordinates = [round(value, 2) for value in self.coordinates[index].tolist()]
+        return {
+            "text": self.texts[index],
+            "bounding_box": {
+                "coordinates": get_box_dict(*coordinates),
+                "decimal_coordinates": get_box_dict(
+                    *self.decimal_coordinates[index].tolist()
+                ),
+            },
+        }
+
+    def __iter__(self) -> Iterator[Dict[str, Any]]:
+        for index in range(len(self)):
+            yield self[index]
+
+    def __getstate__(self) -> Dict[str, Any]:
+        # The indexes are rebuilt on demand rather than pickled
+        return {**self.__dict__, "word_index": None, "text_index": None}
+
+    def __setstate__(self, state: Dict[str, Any]) -> None:
+        self.__dict__.update({"word_index": None, "text_index": None, **state})
+
+    def to_list(self) -> List[Dict[str, Any]]:
+        return list(self)
+
+
+class PageLines(Sequence[Dict[str, Any]]):
+    """Columnar storage for the lines of a page.
+
+    Decimal coordinates are an (n, 4) float64 array ordered x0, y0, x1, y1 and
+    average pixel values an (n, 3) uint8 array, or None when the line colours
+    were not sampled.
+    """
+
+    def __init__(
+        self,
+        decimal_coordinates: np.ndarray,
+        average_pixel_values: Optional[np.ndarray] = None,
+    ) -> None:
+        self.decimal_coordinates = np.ascontiguousarray(
+            decimal_coordinates, dtype=np.float64
+        ).reshape(-1, 4)
+        self.average_pixel_values = (
+            None
+            if average_pixel_values is None
+            else np.ascontiguousarray(average_pixel_values, dtype=np.uint8).reshape(
+                -1, 3
+            )
+        )
+
+    @classmethod
+    def from_items(cls, items: Sequence[Dict[str, Any]]) -> "PageLines":
+        """Build from the dictionary representation of a page's lines."""
+        decimal_coordinates = []
+        average_pixel_values = []
+        for item in items:
+            box = item["decimal_coordinates"]
+            decimal_coordinates.append(
+                (
+                    box["top_left"]["x"],
+                    box["top_left"]["y"],
+                    box["bottom_right"]["x"],
+                    box["bottom_right"]["y"],
+                )
+            )
+            if "average_pixel_value" in item:
+                average_pixel_values.append(item["average_pixel_value"])
+        return cls(
+            np.array(decimal_coordinates),
+            (
+                np.array(average_pixel_values)
+                if items and len(average_pixel_values) == len(items)
+                else None
+            ),
+        )
+
+    def __len__(self) -> int:
+        return len(self.decimal_coordinates)
+
+    def __getitem__(self, index: Any) -> Any:
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(len(self)))]
+        line: Dict[str, Any] = {
+            "decimal_coordinates": get_box_dict(
+                *self.decimal_coordinates[index].tolist()
+            )
+        }
+        if self.average_pixel_values is not None:
+            line["average_pixel_value"] = self.average_pixel_values[index].tolist()
+        return line
+
+    def __iter__(self) -> Iterator[Dict[str, Any]]:
+        for index in range(len(self)):
+            yield self[index]
+
+    def to_list(self) -> List[Dict[str, Any]]:
+        return list(self)
+
+
+class ColumnarPage(Mapping[str, Any]):
+    """A page of extracted data with columnar words and lines.
+
+    Provides the same keys as the dictionary pages of DataExtractor, so it
+    can be used anywhere pdf_data["pages"][index] is read.
+    """
+
+    def __init__(self, page_number: int, content: PageWords, lines: PageLines) -> None:
+        self.page_number = page_number
+        self.content = content
+        self.lines = lines
+
+    def __getitem__(self, key: str) -> Any:
+        if key not in ("page_number", "content", "lines"):
+            raise KeyError(key)
+        return getattr(self, key)
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(("page_number", "content", "lines"))
+
+    def __len__(self) -> int:
+        return 3
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "page_number": self.page_number,
+            "content": self.content.to_list(),
+            "lines": self.lines.to_list(),
+        }
+
+
+def as_dict_pdf_data(pdf_data: Dict[str, Any]) -> Dict[str, Any]:
+    """Convert extracted data with columnar pages to plain, JSON-ready dictionaries."""
+    pages: List[Union[ColumnarPage, Dict[str, Any]]] = pdf_data["pages"]
+    return {
+        **pdf_data,
+        "pages": [
+            page.to_dict() if isinstance(page, ColumnarPage) else page for page in pages
+        ],
+    }
+
+
+class PageRaster:
+    """A rendered page kept as a read-only uint8 RGB pixel buffer.
+
+    Avoids the JPEG encode/decode round trip: consumers read the pixels
+    directly and crops are views into the same buffer. JPEG bytes and PIL
+    images are only produced for callers that ask for them.
+    """
+
+    def __init__(self, pixels: np.ndarray) -> None:
+        self.pixels = np.ascontiguousarray(pixels, dtype=np.uint8)
+        self.pixels.flags.writeable = False
+
+    @classmethod
+    def from_image(cls, image: Image.Image) -> "PageRaster":
+        return cls(np.asarray(image.convert("RGB")))
+
+    @property
+    def width(self) -> int:
+        return self.pixels.shape[1]
+
+    @property
+    def height(self) -> int:
+        return self.pixels.shape[0]
+
+    @property
+    def size(self) -> Tuple[int, int]:
+        return (self.width, self.height)
+
+    def crop(self, crop_box: Tuple[int, int, int, int]) -> np.ndarray:
+        """Get a pixel crop box (x_min, y_min, x_max, y_max), like Image.crop.
+
+        A box within the page is a view. Parts of the box beyond the page
+        are black, and an inverted box raises ValueError, as with PIL.
+        """
+        x_min, y_min, x_max, y_max = crop_box
+        if x_max < x_min:
+            raise ValueError("Coordinate 'right' is less than 'left'")
+        if y_max < y_min:
+            raise ValueError("Coordinate 'lower' is less than 'upper'")
+        if x_min >= 0 and y_min >= 0 and x_max <= self.width and y_max <= self.height:
+            return self.pixels[y_min:y_max, x_min:x_max]
+
+        cropped = np.zeros((y_max - y_min, x_max - x_min, 3), dtype=np.uint8)
+        source_x_min, source_y_min = max(x_min, 0), max(y_min, 0)
+        source_x_max, source_y_max = min(x_max, self.width), min(y_max, self.height)
+        if source_x_min < source_x_max and source_y_min < source_y_max:
+            cropped[
+                source_y_min - y_min : source_y_max - y_min,
+                source_x_min - x_min : source_x_max - x_min,
+            ] = self.pixels[source_y_min:source_y_max, source_x_min:source_x_max]
+        return cropped
+
+    @classmethod
+    def from_bytes(cls, value: bytes) -> "PageRaster":
+        with Image.open(io.BytesIO(value)) as image:
+            return cls.from_image(image)
+
+    def to_bytes(self) -> bytes:
+        """Serialize the pixels as a PNG, lossless unlike JPEG.
+
+        A rendered page compresses about 30 times; the fastest compression
+        level is used as higher levels barely shrink it further.
+        """
+        png_bytes = io.BytesIO()
+        self.to_image().save(png_bytes, format="PNG", compress_level=1)
+        return png_bytes.getvalue()
+
+    def to_image(self) -> Image.Image:
+        return Image.fromarray(self.pixels)
+
+    def to_jpg_bytes(self) -> bytes:
+        img_byte_arr = io.BytesIO()
+        self.to_image().save(img_byte_arr, format="JPEG")
+        return img_byte_arr.getvalue()
@@ -1,53 +1,111 @@
-import json
-import os
+import time
 import uuid
-from jsonschema import validate
+from concurrent.futures import Future
+from contextlib import contextmanager
 from datetime import datetime
-from typing import Any, Dict, List, Optional
+from itertools import groupby
+from typing import (
+    IO,
+    Any,
+    Dict,
+    Iterator,
+    List,
+    Mapping,
+    Optional,
+    Pattern,
+    Sequence,
+    Tuple,
+    Union,
+)
+
+from PIL import Image
 
 from pdf_parser.forms import FormProcessor
-from pdf_parser.extractors import TextExtractor
+from pdf_parser.extractors import DataExtractor, ImageExtractor, TextExtractor
+from pdf_parser.cache import OCRCache
 from pdf_parser.coordinate_utils import CoordinateUtils
-from pdf_parser.tables import TableProcessor, TableSplitter
+from pdf_parser.instrumentation import Instrumentation, get_instrumentation
+from pdf_parser.ocr import OCRExecutor
+from pdf_parser.output import OutputWriter
+from pdf_parser.tables import TableCellAssigner, TableProcessor, TableSplitter
 from pdf_parser.pydantic_models import Document
+from pdf_parser.templates import CompiledTemplate
 
 
-class Parser:
-    def __init__(self) -> None:
-        self.coordinate_utils = CoordinateUtils()
-        self.text_extractor = TextExtractor(self.coordinate_utils)
+class ParseEvent:
+    """A form or table parsed by Parser.iter_parse.
 
-    def page_number_converter(
-        self, page_numbers: str, number_of_pages: int
-    ) -> List[int]:
-        if ":" in page_numbers:
-            left_index = int(page_numbers.split(":")[0])
-            right_index = int(page_numbers.split(":")[1])
-        else:
-            index = int(page_numbers)
-            if index >= 0:
-                index = index - 1
-            elif index < 0:
-                index = number_of_pages + index
-            return [index]
+    `kind` is "form" or "table" and `data` the form's fields or the table's
+    {"data": rows}, as they appear in the parse_pdf output. Events come in
+    page order; sorting each kind by `order`, the positions of the page rule
+    in the template, the page in the page rule and the rule in the page
+    rule, gives the order parse_pdf outputs them in.
+    """
+
+    def __init__(
+        self,
+        kind: str,
+        rule_id: str,
+        page_index: int,
+        data: Dict[str, Any],
+        order: Tuple[int, int, int],
+    ) -> None:
+        self.kind = kind
+        self.rule_id = rule_id
+        self.page_index = page_index
+        self.data = data
+        self.order = order
 
-        if left_index > 0:
-            left_index -= 1
-        if right_index > 0:
-            right_index -= 1
+    def __repr__(self) -> str:
+        return (
+            f"ParseEvent(kind={self.kind!r}, rule_id={self.rule_id!r},"
+            f" page_index={self.page_index})"
+        )
 
-        if left_index < 0:
-            left_index = number_of_pages + left_index + 1
-        if right_index < 0:
-            right_index = number_of_pages + right_index + 1
 
-        if left_index == right_index:
-            return [left_index]
+class Parser:
+    output_modes = ("pydantic", "direct")
 
-        return list(range(left_index, right_index))
+    def __init__(
+        self,
+        ocr_mode: str = "cell",
+        ocr_workers: int = 1,
+        ocr_cache: Optional[OCRCache] = None,
+        instrumentation: Optional[Instrumentation] = None,
+        output_mode: str = "pydantic",
+        validate_output: bool = False,
+    ) -> None:
+        if output_mode not in self.output_modes:
+            raise ValueError(f"Invalid output mode: {output_mode}")
+
+        self.output_mode = output_mode
+        self.validate_output = validate_output
+        self.instrumentation = get_instrumentation(instrumentation)
+        self.coordinate_utils = CoordinateUtils(self.instrumentation)
+        self.ocr_workers = ocr_workers
+        # Created by get_ocr_executor when the first OCR template is parsed
+        self.ocr_executor: Optional[OCRExecutor] = None
+        self.text_extractor = TextExtractor(
+            self.coordinate_utils,
+            ocr_mode=ocr_mode,
+            ocr_cache=ocr_cache,
+            instrumentation=self.instrumentation,
+        )
+
+    def get_ocr_executor(self) -> Optional[OCRExecutor]:
+        """Get the OCR thread pool, starting it on first use if ocr_workers > 1."""
+        if self.ocr_executor is None and self.ocr_workers > 1:
+            self.ocr_executor = OCRExecutor(self.ocr_workers)
+            self.text_extractor.ocr_executor = self.ocr_executor
+        return self.ocr_executor
+
+    def page_number_converter(
+        self, page_numbers: str, number_of_pages: int
+    ) -> List[int]:
+        return CompiledTemplate.page_number_converter(page_numbers, number_of_pages)
 
     def get_rule_from_id(
-        self, rule_id: str, template: Dict[str, Any]
+        self, rule_id: str, template: Mapping[str, Any]
     ) -> Dict[str, Any]:
         return self.coordinate_utils.get_rule_from_id(rule_id, template)
 
@@ -56,9 +114,9 @@ class Parser:
         page_content: List[Dict[str, Any]],
         coordinates: Optional[Dict[str, Dict[str, float]]],
         extraction_method: str,
-        jpg_bytes_page: bytes,
+        jpg_bytes_page: Union[bytes, Image.Image, None],
         search_type: Optional[str] = None,
-        regex: Optional[str] = None,
+        regex: Optional[Union[str, Pattern[str]]] = None,
     ) -> str:
         return self.text_extractor.get_text_from_page(
             page_content,
@@ -74,28 +132,48 @@ class Parser:
         form_rule_id: str,
         page_index: int,
         pdf_data: Dict[str, Any],
-        template: Dict[str, Any],
-        jpg_bytes: List[bytes],
+        template: Mapping[str, Any],
+        jpg_bytes: Sequence[bytes],
     ) -> Dict[str, str]:
         form_processor = FormProcessor(self)
-        return form_processor.get_output_data_from_form_rule(
-            form_rule_id,
-            page_index,
-            pdf_data,
-            template,
-            jpg_bytes,
-        )
+        with self.instrumentation.stage("form"):
+            form = form_processor.get_output_data_from_form_rule(
+                form_rule_id,
+                page_index,
+                pdf_data,
+                template,
+                jpg_bytes,
+            )
+        self.instrumentation.increment("forms_extracted")
+        return form
 
     def get_output_data_from_table_rule(
         self,
         table_rule_id: str,
         page_index: int,
         pdf_data: Dict[str, Any],
-        template: Dict[str, Any],
-        jpg_bytes: List[bytes],
+        template: Mapping[str, Any],
+        jpg_bytes: Sequence[bytes],
+    ) -> List[Dict[str, Any]]:
+        with self.instrumentation.stage("table"):
+            ordered_data = self.get_table_data(
+                table_rule_id, page_index, pdf_data, template, jpg_bytes
+            )
+        self.instrumentation.increment("tables_extracted")
+        return ordered_data
+
+    def get_table_data(
+        self,
+        table_rule_id: str,
+        page_index: int,
+        pdf_data: Dict[str, Any],
+        template: Mapping[str, Any],
+        jpg_bytes: Sequence[bytes],
     ) -> List[Dict[str, Any]]:
-        table_processor = TableProcessor(template)
-        table_splitter = TableSplitter(template)
+        table_processor = TableProcessor(
+            template, self.coordinate_utils, self.instrumentation
+        )
+        table_splitter = TableSplitter(template, self.coordinate_utils)
         table_rule = self.get_rule_from_id(table_rule_id, template)
         delimiter_field_name = table_rule["config"]["row_delimiter"]["field_name"]
         delimiter_type = table_rule["config"]["row_delimiter"]["type"]
@@ -108,20 +186,42 @@ class Parser:
 
         data: Dict[int, Dict[str, str]] = {}
 
-        jpg_bytes_page = jpg_bytes[page_index]
+        page_content = pdf_data["pages"][page_index]["content"]
 
         extraction_method = template["extraction_method"]
+        if extraction_method == "extraction":
+            # Assign all words of a column to its rows at once instead of
+            # querying the page once per cell
+            table_cell_assigner = TableCellAssigner(
+                self.coordinate_utils.get_word_index(page_content),
+                instrumentation=self.instrumentation,
+            )
+        else:
+            jpg_bytes_page = ImageExtractor.get_page_image(jpg_bytes, page_index)
+            if self.text_extractor.ocr_mode == "page":
+                # Cells are answered from the words of a single OCR run
+                table_cell_assigner = TableCellAssigner(
+                    self.coordinate_utils.get_word_index(
+                        self.text_extractor.page_ocr.get_page_words(jpg_bytes_page)
+                    ),
+                    instrumentation=self.instrumentation,
+                )
+
         for column in processed_columns:
             split_boxes = table_splitter.split_bounding_box_by_lines(
                 column["coordinates"], column["lines_y_coordinates"]
             )
-            for row_index, box in enumerate(split_boxes):
-                text_value = self.get_text_from_page(
-                    pdf_data["pages"][page_index]["content"],
-                    box,
-                    extraction_method,
-                    jpg_bytes_page,
+            if (
+                extraction_method == "extraction"
+                or self.text_extractor.ocr_mode == "page"
+            ):
+                text_values = table_cell_assigner.get_text_from_boxes(split_boxes)
+            else:
+                text_values = self.text_extractor.get_texts_from_ocr(
+                    jpg_bytes_page, split_boxes
                 )
+            self.instrumentation.increment("cells_produced", len(text_values))
+            for row_index, text_value in enumerate(text_values):
                 if row_index not in data:
                     data[row_index] = {}
                 data[row_index][column["field_name"]] = text_value
@@ -131,67 +231,427 @@ class Parser:
 
         return ordered_data
 
+    @staticmethod
+    def print_rule_error(rule_id: str, page_index: int) -> None:
+        print(
+            f"Rule ID '{rule_id}' not found in template rules or page index '{page_index}' is out of range."
+        )
+
     @staticmethod
     def parse_pdf(
-        template: Dict[str, Any], pdf_data: Dict[str, Any], jpg_bytes: List[bytes]
-    ) -> Dict[str, Any]:
+        template: Union[Dict[str, Any], CompiledTemplate],
+        pdf_data: Dict[str, Any],
+        jpg_bytes: Sequence[bytes],
+        ocr_mode: str = "cell",
+        ocr_workers: int = 1,
+        ocr_cache: Optional[OCRCache] = None,
+        instrumentation: Optional[Instrumentation] = None,
+        include_metrics: bool = False,
+        output_mode: str = "pydantic",
+        validate_output: bool = False,
+    ) -> str:
+        """Parse extracted PDF data with a template.
+
+        The template may be a raw dictionary or a CompiledTemplate. Raw
+        templates are compiled (and validated) once per distinct content.
+        For OCR templates, ocr_mode "page" runs tesseract once per page
+        instead of once per field and table cell, ocr_workers > 1 runs that
+        many OCR requests at a time, and an OCRCache shared between calls
+        skips tesseract for crops it has already seen.
+
+        An Instrumentation records stage timings and counters, and is flushed
+        to its sinks once the document is parsed. With include_metrics its
+        metrics, including those of an extraction recorded with the same
+        instance, are also added to the output metadata.
+
+        output_mode "pydantic" serializes the output through the Document
+        model, and "direct" writes the same JSON straight from the parsed
+        dictionaries, validating it against the model only if
+        validate_output is set.
+        """
+        compiled_template = CompiledTemplate.compile(template)
+
+        with Parser.open(
+            ocr_mode=ocr_mode,
+            ocr_workers=ocr_workers,
+            ocr_cache=ocr_cache,
+            instrumentation=instrumentation,
+            output_mode=output_mode,
+            validate_output=validate_output,
+        ) as parser:
+            return parser.parse_template(
+                compiled_template, pdf_data, jpg_bytes, include_metrics
+            )
+
+    @staticmethod
+    def iter_parse(
+        template: Union[Dict[str, Any], CompiledTemplate],
+        pdf_data: Dict[str, Any],
+        jpg_bytes: Sequence[bytes],
+        ocr_mode: str = "cell",
+        ocr_workers: int = 1,
+        ocr_cache: Optional[OCRCache] = None,
+        instrumentation: Optional[Instrumentation] = None,
+    ) -> Iterator[ParseEvent]:
+        """Parse extracted PDF data, yielding each form and table when it is done.
+
+        Pages are parsed in page order, so the results of the first pages
+        are available before the rest of the document is parsed.
+        """
+        compiled_template = CompiledTemplate.compile(template)
+
+        with Parser.open(
+            ocr_mode=ocr_mode,
+            ocr_workers=ocr_workers,
+            ocr_cache=ocr_cache,
+            instrumentation=instrumentation,
+        ) as parser:
+            yield from parser.iter_events(compiled_template, pdf_data, jpg_bytes)
+
+    @staticmethod
+    def iter_parse_pdf(
+        template: Union[Dict[str, Any], CompiledTemplate],
+        data_extractor: DataExtractor,
+        ocr_mode: str = "cell",
+        ocr_workers: int = 1,
+        ocr_cache: Optional[OCRCache] = None,
+        instrumentation: Optional[Instrumentation] = None,
+    ) -> Iterator[ParseEvent]:
+        """Extract and parse a PDF page by page, yielding each form and table.
+
+        Each page is extracted when the parse reaches it and released once
+        its rules have run, so memory stays flat for long documents.
+        """
+        compiled_template = CompiledTemplate.compile(template)
+        number_of_pages = data_extractor.get_number_of_pages()
+        if data_extractor.page_images is None:
+            data_extractor.page_images = data_extractor.create_page_image_provider(
+                number_of_pages
+            )
+        pdf_data: Dict[str, Any] = {"pages": [None] * number_of_pages}
 
-        schema_path = os.path.join(
-            os.path.dirname(__file__),
-            "schema",
-            "template_json_schema.json",
+        with Parser.open(
+            ocr_mode=ocr_mode,
+            ocr_workers=ocr_workers,
+            ocr_cache=ocr_cache,
+            instrumentation=instrumentation,
+        ) as parser:
+            yield from parser.iter_events(
+                compiled_template,
+                pdf_data,
+                data_extractor.page_images,
+                data_extractor.iter_pages(),
+            )
+
+    @staticmethod
+    def parse_pdf_to_file(
+        template: Union[Dict[str, Any], CompiledTemplate],
+        pdf_data: Dict[str, Any],
+        jpg_bytes: Sequence[bytes],
+        output_file: IO[str],
+        ocr_mode: str = "cell",
+        ocr_workers: int = 1,
+        ocr_cache: Optional[OCRCache] = None,
+        instrumentation: Optional[Instrumentation] = None,
+        include_metrics: bool = False,
+        validate_output: bool = False,
+    ) -> None:
+        """Parse extracted PDF data and stream the output JSON to a text file.
+
+        Writes the same JSON as parse_pdf, in chunks of table rows, so the
+        output of a long statement is never held as one string.
+        """
+        compiled_template = CompiledTemplate.compile(template)
+
+        with Parser.open(
+            ocr_mode=ocr_mode,
+            ocr_workers=ocr_workers,
+            ocr_cache=ocr_cache,
+            instrumentation=instrumentation,
+            validate_output=validate_output,
+        ) as parser:
+            output = parser.get_output(
+                compiled_template, pdf_data, jpg_bytes, include_metrics
+            )
+            with parser.instrumentation.stage("serialize"):
+                OutputWriter.write_json(output, output_file, validate_output)
+
+    @staticmethod
+    @contextmanager
+    def open(**parser_options: Any) -> Iterator["Parser"]:
+        """Create a Parser for one document and shut its OCR executor down after."""
+        parser = Parser(**parser_options)
+        try:
+            yield parser
+        except BaseException:
+            # Stop queued OCR work as soon as the document fails
+            if parser.ocr_executor is not None:
+                parser.ocr_executor.cancel()
+            raise
+        if parser.ocr_executor is not None:
+            parser.ocr_executor.shutdown()
+        parser.instrumentation.flush()
+
+    @staticmethod
+    def evaluate_templates(
+        templates: Sequence[Union[Dict[str, Any], CompiledTemplate]],
+        pdf_data: Dict[str, Any],
+        jpg_bytes: Sequence[bytes],
+        ocr_mode: str = "cell",
+        ocr_workers: int = 1,
+        ocr_cache: Optional[OCRCache] = None,
+        instrumentation: Optional[Instrumentation] = None,
+    ) -> List[Dict[str, Any]]:
+        """Parse one extracted document with each of several templates.
+
+        All templates share one Parser, so word indexes, page OCR results,
+        decoded page images and, through an OCRCache, the OCR of identical
+        crops are computed once for the document rather than once per
+        template. Returns, in template order, a dictionary per template with
+        its name, output JSON (None if it failed), error and seconds taken.
+        """
+        if ocr_cache is None:
+            ocr_cache = OCRCache()
+        parser = Parser(
+            ocr_mode=ocr_mode,
+            ocr_workers=ocr_workers,
+            ocr_cache=ocr_cache,
+            instrumentation=instrumentation,
         )
 
-        if not os.path.exists(schema_path):
-            raise FileNotFoundError(f"Schema file not found: {schema_path}")
+        results = []
+        try:
+            for template in templates:
+                start_time = time.perf_counter()
+                output = None
+                error = None
+                try:
+                    compiled_template = CompiledTemplate.compile(template)
+                    output = parser.parse_template(
+                        compiled_template, pdf_data, jpg_bytes
+                    )
+                except Exception as e:
+                    error = f"{type(e).__name__}: {e}"
+                results.append(
+                    {
+                        "template_name": template.get("metadata", {}).get(
+                            "template_name"
+                        ),
+                        "output": output,
+                        "error": error,
+                        "seconds": time.perf_counter() - start_time,
+                    }
+                )
+        finally:
+            if parser.ocr_executor is not None:
+                parser.ocr_executor.shutdown()
+        parser.instrumentation.flush()
+        return results
 
-        with open(schema_path) as schema_file:
-            template_json_schema = json.load(schema_file)
+    def parse_template(
+        self,
+        compiled_template: CompiledTemplate,
+        pdf_data: Dict[str, Any],
+        jpg_bytes: Sequence[bytes],
+        include_metrics: bool = False,
+    ) -> str:
+        """Parse extracted PDF data with a compiled template using this parser."""
+        output = self.get_output(
+            compiled_template, pdf_data, jpg_bytes, include_metrics
+        )
 
-        validate(instance=template, schema=template_json_schema)
+        with self.instrumentation.stage("serialize"):
+            if self.output_mode == "direct":
+                return OutputWriter.to_json(output, self.validate_output)
 
-        forms = []
-        tables = []
-        number_of_pages = len(pdf_data["pages"])
+            output_document = Document(**output)
+            if output_document.metadata.metrics is None:
+                return output_document.model_dump_json(
+                    exclude={"metadata": {"metrics"}}
+                )
+            return output_document.model_dump_json()
 
-        for page_rule in template["pages"]:
-            page_indexes = Parser().page_number_converter(
-                page_rule["page_numbers"], number_of_pages
+    def get_output(
+        self,
+        compiled_template: CompiledTemplate,
+        pdf_data: Dict[str, Any],
+        jpg_bytes: Sequence[bytes],
+        include_metrics: bool = False,
+    ) -> Dict[str, Any]:
+        """Parse extracted PDF data into the output dictionary, unserialized."""
+        with self.instrumentation.stage("parse"):
+            forms, tables = self.get_forms_and_tables(
+                compiled_template, pdf_data, jpg_bytes
             )
-            for page_index in page_indexes:
-                if "forms" in page_rule and len(page_rule["forms"]) > 0:
-                    for rule_id in page_rule["forms"]:
+
+        metadata: Dict[str, Any] = {
+            "document_id": str(uuid.uuid4()),
+            "parsed_at": datetime.now().strftime("%Y-%m-%dT%H:%M:%S.%fZ"),
+            "number_of_pages": len(pdf_data["pages"]),
+        }
+        if include_metrics:
+            metadata["metrics"] = self.instrumentation.get_metrics()
+        return {
+            "metadata": metadata,
+            "pages": [{"forms": forms, "tables": tables}],
+        }
+
+    def get_forms_and_tables(
+        self,
+        compiled_template: CompiledTemplate,
+        pdf_data: Dict[str, Any],
+        jpg_bytes: Sequence[bytes],
+    ) -> Tuple[List[Dict[str, str]], List[Dict[str, Any]]]:
+        """Apply the rules of every page rule to their pages."""
+        form_events = []
+        table_events = []
+        for event in self.iter_events(compiled_template, pdf_data, jpg_bytes):
+            if event.kind == "form":
+                form_events.append(event)
+            else:
+                table_events.append(event)
+
+        # Back into template order: page rule, then page, then rule
+        form_events.sort(key=lambda event: event.order)
+        table_events.sort(key=lambda event: event.order)
+        return (
+            [event.data for event in form_events],
+            [event.data for event in table_events],
+        )
+
+    def iter_events(
+        self,
+        compiled_template: CompiledTemplate,
+        pdf_data: Dict[str, Any],
+        jpg_bytes: Sequence[bytes],
+        pages: Optional[Iterator[Any]] = None,
+    ) -> Iterator["ParseEvent"]:
+        """Apply the rules of every page rule, page by page in page order.
+
+        Yields a ParseEvent for each form and table as soon as it is done.
+        With pages, an iterator over the extracted pages in page order,
+        pdf_data["pages"] is filled in as the walk reaches each page and each
+        page is released once its rules have run.
+        """
+        form_executor = (
+            self.get_ocr_executor()
+            if compiled_template.extraction_method == "ocr"
+            else None
+        )
+        number_of_pages = len(pdf_data["pages"])
+        # (page index, page rule position, page position, page rule); the
+        # sort is stable, so rules of a page keep their template order
+        tasks = sorted(
+            (
+                (page_index, page_rule_position, page_position, page_rule)
+                for page_rule_position, (page_rule, page_indexes) in enumerate(
+                    compiled_template.get_page_rules(number_of_pages)
+                )
+                for page_position, page_index in enumerate(page_indexes)
+            ),
+            key=lambda task: task[0],
+        )
+        # Form OCR requests are independent, so they are queued on the OCR
+        # executor ahead of the walk, or a page ahead when pages are streamed
+        form_futures: Dict[Tuple[int, int, int], Future] = {}
+        loaded_pages = 0
+
+        try:
+            if form_executor is not None and pages is None:
+                self.submit_forms(
+                    form_executor,
+                    tasks,
+                    pdf_data,
+                    compiled_template,
+                    jpg_bytes,
+                    form_futures,
+                )
+            for page_index, page_task_group in groupby(tasks, key=lambda task: task[0]):
+                page_tasks = list(page_task_group)
+                if pages is not None:
+                    while loaded_pages <= page_index and loaded_pages < number_of_pages:
+                        pdf_data["pages"][loaded_pages] = next(pages)
+                        loaded_pages += 1
+                    if form_executor is not None:
+                        self.submit_forms(
+                            form_executor,
+                            page_tasks,
+                            pdf_data,
+                            compiled_template,
+                            jpg_bytes,
+                            form_futures,
+                        )
+
+                for _, page_rule_position, page_position, page_rule in page_tasks:
+                    for rule_position, rule_id in enumerate(page_rule.get("forms", [])):
+                        order = (page_rule_position, page_position, rule_position)
                         try:
-                            form = Parser().get_output_data_from_form_rule(
-                                rule_id, page_index, pdf_data, template, jpg_bytes
-                            )
-                            forms.append(form)
+                            if form_executor is not None:
+                                form = form_futures.pop(order).result()
+                            else:
+                                form = self.get_output_data_from_form_rule(
+                                    rule_id,
+                                    page_index,
+                                    pdf_data,
+                                    compiled_template,
+                                    jpg_bytes,
+                                )
                         except IndexError:
-                            print(
-                                f"Rule ID '{rule_id}' not found in template rules or page index '{page_index}' is out of range."
-                            )
-                if "tables" in page_rule and len(page_rule["tables"]) > 0:
-                    for rule_id in page_rule["tables"]:
+                            Parser.print_rule_error(rule_id, page_index)
+                            continue
+                        yield ParseEvent("form", rule_id, page_index, form, order)
+
+                    for rule_position, rule_id in enumerate(
+                        page_rule.get("tables", [])
+                    ):
+                        order = (page_rule_position, page_position, rule_position)
                         try:
-                            table_data = Parser().get_output_data_from_table_rule(
-                                rule_id, page_index, pdf_data, template, jpg_bytes
+                            table_data = self.get_output_data_from_table_rule(
+                                rule_id,
+                                page_index,
+                                pdf_data,
+                                compiled_template,
+                                jpg_bytes,
                             )
-
-                            tables.append({"data": table_data})
                         except IndexError:
-                            print(
-                                f"Rule ID '{rule_id}' not found in template rules or page index '{page_index}' is out of range."
-                            )
+                            Parser.print_rule_error(rule_id, page_index)
+                            continue
+                        yield ParseEvent(
+                            "table", rule_id, page_index, {"data": table_data}, order
+                        )
 
-        output = {
-            "metadata": {
-                "document_id": str(uuid.uuid4()),
-                "parsed_at": datetime.now().strftime("%Y-%m-%dT%H:%M:%S.%fZ"),
-                "number_of_pages": number_of_pages,
-            },
-            "pages": [{"forms": forms, "tables": tables}],
-        }
+                if pages is not None and 0 <= page_index < number_of_pages:
+                    self.release_page(pdf_data, page_index)
+        finally:
+            # Drop this template's queued form requests if the walk stopped
+            # early; the executor may be shared with other templates
+            for form_future in form_futures.values():
+                form_future.cancel()
 
-        output_document = Document(**output)
+    def submit_forms(
+        self,
+        form_executor: OCRExecutor,
+        tasks: List[Tuple[int, int, int, Dict[str, Any]]],
+        pdf_data: Dict[str, Any],
+        compiled_template: CompiledTemplate,
+        jpg_bytes: Sequence[bytes],
+        form_futures: Dict[Tuple[int, int, int], Future],
+    ) -> None:
+        for page_index, page_rule_position, page_position, page_rule in tasks:
+            for rule_position, rule_id in enumerate(page_rule.get("forms", [])):
+                form_futures[
+                    (page_rule_position, page_position, rule_position)
+                ] = form_executor.submit(
+                    self.get_output_data_from_form_rule,
+                    rule_id,
+                    page_index,
+                    pdf_data,
+                    compiled_template,
+                    jpg_bytes,
+                )
 
-        return output_document.model_dump_json()
+    def release_page(self, pdf_data: Dict[str, Any], page_index: int) -> None:
+        """Drop a streamed page and the indexes built over its words."""
+        page = pdf_data["pages"][page_index]
+        self.coordinate_utils.release_page_content(page["content"])
+        pdf_data["pages"][page_index] = None
@@ -1,4 +1,4 @@
-from typing import List, Optional
+from typing import Any, Dict, List, Optional
 
 from pydantic import BaseModel, RootModel
 
@@ -7,6 +7,7 @@ class Metadata(BaseModel):
     document_id: str
     parsed_at: str
     number_of_pages: int
+    metrics: Optional[Dict[str, Any]] = None
 
 
 class Table(BaseModel):
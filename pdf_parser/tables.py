@@ -1,14 +1,25 @@
-from typing import Dict, List, Any, Optional
-from pdf_parser.coordinate_utils import CoordinateUtils
+from typing import Dict, List, Any, Mapping, Optional
+
+import numpy as np
+
+from pdf_parser.coordinate_utils import CoordinateUtils, WordIndex
+from pdf_parser.instrumentation import Instrumentation, get_instrumentation
+from pdf_parser.page_data import PageLines
 
 
 class TableProcessor:
-    def __init__(self, template: Dict[str, Any]) -> None:
+    def __init__(
+        self,
+        template: Mapping[str, Any],
+        coordinate_utils: Optional[CoordinateUtils] = None,
+        instrumentation: Optional[Instrumentation] = None,
+    ) -> None:
         self.template = template
-        self.coordinate_utils = CoordinateUtils()
+        self.coordinate_utils = coordinate_utils or CoordinateUtils()
+        self.instrumentation = get_instrumentation(instrumentation)
 
     def get_delimiter_column_coordinates(
-        self, template: Dict[str, Any], delimiter_field_name: str, rule_id: str
+        self, template: Mapping[str, Any], delimiter_field_name: str, rule_id: str
     ) -> Optional[Dict[str, Dict[str, float]]]:
         """Get the coordinates of the description column from the template."""
         delimiter_coordinates = None
@@ -34,23 +45,30 @@ class TableProcessor:
             self.template, delimiter_field_name, table_rule["rule_id"]
         )
 
-        table_splitter = TableSplitter(self.template)
+        table_splitter = TableSplitter(self.template, self.coordinate_utils)
 
-        if delimiter_type == "line":
-            max_pixel_value = table_rule["config"]["row_delimiter"].get(
-                "max_pixel_value", 255
-            )
-            lines_y_coordinates = table_splitter.split_table(
-                delimiter_type, page_content, max_pixel_value=max_pixel_value
-            )
+        tolerance = table_rule["config"]["row_delimiter"].get("tolerance")
 
-        if delimiter_type == "field":
-            lines_y_coordinates = table_splitter.split_table(
-                delimiter_type,
-                page_content,
-                delimiter_field_name=delimiter_field_name,
-                rule_id=table_rule["rule_id"],
-            )
+        with self.instrumentation.stage("table.split"):
+            if delimiter_type == "line":
+                max_pixel_value = table_rule["config"]["row_delimiter"].get(
+                    "max_pixel_value", 255
+                )
+                lines_y_coordinates = table_splitter.split_table(
+                    delimiter_type,
+                    page_content,
+                    max_pixel_value=max_pixel_value,
+                    tolerance=tolerance,
+                )
+
+            if delimiter_type == "field":
+                lines_y_coordinates = table_splitter.split_table(
+                    delimiter_type,
+                    page_content,
+                    delimiter_field_name=delimiter_field_name,
+                    rule_id=table_rule["rule_id"],
+                    tolerance=tolerance,
+                )
 
         if not delimiter_coordinates:
             raise ValueError("Delimiter coordinates not found")
@@ -69,9 +87,18 @@ class TableProcessor:
 
 
 class TableSplitter:
-    def __init__(self, template: Dict[str, Any]) -> None:
+    # Row boundaries closer than the tolerance are merged into one. Word tops
+    # of a row vary slightly, while ruled lines are kept as drawn
+    field_tolerance = 0.01
+    line_tolerance = 0.0
+
+    def __init__(
+        self,
+        template: Mapping[str, Any],
+        coordinate_utils: Optional[CoordinateUtils] = None,
+    ) -> None:
         self.template = template
-        self.coordinate_utils = CoordinateUtils()
+        self.coordinate_utils = coordinate_utils or CoordinateUtils()
 
     def split_bounding_box_by_lines(
         self,
@@ -121,9 +148,16 @@ class TableSplitter:
         self, lines: List[Dict[str, Any]], max_pixel_value: Optional[int] = None
     ) -> List[Dict[str, Any]]:
         """Filter lines based on their average pixel value."""
+        if max_pixel_value is None:
+            return list(lines)
+
         filtered_lines = []
         for line in lines:
-            if "average_pixel_value" in line:
+            if "average_pixel_value" not in line:
+                # Lines extracted without their colour pass when no filter applies
+                if max_pixel_value >= 255:
+                    filtered_lines.append(line)
+            else:
                 avg_red, avg_green, avg_blue = line["average_pixel_value"]
                 if (
                     avg_red <= max_pixel_value
@@ -134,11 +168,15 @@ class TableSplitter:
         return filtered_lines
 
     def split_table_by_field(
-        self, page_content: Dict[str, Any], delimiter_field_name: str, rule_id: str
+        self,
+        page_content: Dict[str, Any],
+        delimiter_field_name: str,
+        rule_id: str,
+        tolerance: Optional[float] = None,
     ) -> List[float]:
         text_coordinates = page_content["content"]
 
-        table_processor = TableProcessor(self.template)
+        table_processor = TableProcessor(self.template, self.coordinate_utils)
 
         delimiter_coordinates = table_processor.get_delimiter_column_coordinates(
             self.template, delimiter_field_name, rule_id
@@ -147,51 +185,74 @@ class TableSplitter:
         if delimiter_coordinates is None:
             raise ValueError("Delimiter coordinates not found")
 
-        items_within_coordinates = self.coordinate_utils.get_items_in_bounding_box(
+        top_y_coordinates = self.coordinate_utils.get_top_y_coordinates_in_bounding_box(
             text_coordinates, delimiter_coordinates
         )
 
-        line_separation_y_coordinates = sorted(
-            list(
-                set(
-                    item["bounding_box"]["decimal_coordinates"]["top_left"]["y"]
-                    for item in items_within_coordinates
-                )
-            )
-        )
+        line_separation_y_coordinates = sorted(list(set(top_y_coordinates)))
 
         line_separation_y_coordinates = self.average_y_coordinates(
-            line_separation_y_coordinates
+            line_separation_y_coordinates,
+            self.field_tolerance if tolerance is None else tolerance,
         )
 
         return line_separation_y_coordinates
 
-    def average_y_coordinates(self, y_coordinates: List[float]) -> List[float]:
-        threshold = 0.01
-        averaged_y_coordinates = []
-        while y_coordinates:
-            current_value = y_coordinates.pop(0)
-            close_values = [current_value]
-
-            # Check for values within 0.01
-            for value in y_coordinates:
-                if abs(value - current_value) < threshold:
-                    close_values.append(value)
-                    y_coordinates.remove(value)
+    def average_y_coordinates(
+        self, y_coordinates: List[float], tolerance: float = 0.01
+    ) -> List[float]:
+        """Merge y-coordinates closer than the tolerance into their average.
 
-            # Calculate the average and add to the result
+        The values are sorted once and swept in order: each cluster starts at
+        its smallest value and takes every following value less than the
+        tolerance above it.
+        """
+        sorted_y_coordinates = sorted(y_coordinates)
+        averaged_y_coordinates = []
+        start = 0
+        while start < len(sorted_y_coordinates):
+            current_value = sorted_y_coordinates[start]
+            stop = start + 1
+            while (
+                stop < len(sorted_y_coordinates)
+                and sorted_y_coordinates[stop] - current_value < tolerance
+            ):
+                stop += 1
+
+            close_values = sorted_y_coordinates[start:stop]
             averaged_y_coordinates.append(sum(close_values) / len(close_values))
+            start = stop
 
         return averaged_y_coordinates
 
     def split_table_by_line(
-        self, lines: List[Dict[str, Any]], max_pixel_value: Optional[int] = None
+        self,
+        lines: List[Dict[str, Any]],
+        max_pixel_value: Optional[int] = None,
+        tolerance: Optional[float] = None,
     ) -> List[float]:
-        filtered_lines = self.filter_lines_by_pixel_value(lines, max_pixel_value)
-        lines_y_coordinates = [
-            line["decimal_coordinates"]["top_left"]["y"] for line in filtered_lines
-        ]
-        return sorted(list(set(lines_y_coordinates)))
+        if isinstance(lines, PageLines):
+            if max_pixel_value is None or lines.average_pixel_values is None:
+                # No filter, or lines without sampled colours, as in the filter below
+                mask = np.full(
+                    len(lines.decimal_coordinates),
+                    max_pixel_value is None or max_pixel_value >= 255,
+                )
+            else:
+                mask = np.all(
+                    lines.average_pixel_values.astype(np.int16) <= max_pixel_value,
+                    axis=1,
+                )
+            lines_y_coordinates = lines.decimal_coordinates[mask, 1].tolist()
+        else:
+            filtered_lines = self.filter_lines_by_pixel_value(lines, max_pixel_value)
+            lines_y_coordinates = [
+                line["decimal_coordinates"]["top_left"]["y"] for line in filtered_lines
+            ]
+        return self.average_y_coordinates(
+            sorted(list(set(lines_y_coordinates))),
+            self.line_tolerance if tolerance is None else tolerance,
+        )
 
     def split_table(
         self,
@@ -200,10 +261,13 @@ class TableSplitter:
         delimiter_field_name: Optional[str] = None,
         rule_id: Optional[str] = None,
         max_pixel_value: Optional[int] = None,
+        tolerance: Optional[float] = None,
     ) -> List[float]:
         if row_delimiter_type == "line":
             return self.split_table_by_line(
-                page_content["lines"], max_pixel_value=max_pixel_value
+                page_content["lines"],
+                max_pixel_value=max_pixel_value,
+                tolerance=tolerance,
             )
         elif row_delimiter_type == "field":
             if delimiter_field_name is None or rule_id is None:
@@ -211,6 +275,80 @@ class TableSplitter:
                     "delimiter_field_name and rule_id are required for field delimiter type"
                 )
             return self.split_table_by_field(
-                page_content, delimiter_field_name, rule_id
+                page_content, delimiter_field_name, rule_id, tolerance=tolerance
             )
         return []
+
+
+class TableCellAssigner:
+    """Assign the words of a page to the row boxes of a table column.
+
+    Equivalent to querying every row box separately with the same threshold,
+    but each column is resolved with one vectorized pass over its words.
+    """
+
+    def __init__(
+        self,
+        word_index: WordIndex,
+        threshold: float = 0.005,
+        instrumentation: Optional[Instrumentation] = None,
+    ) -> None:
+        self.word_index = word_index
+        self.threshold = threshold
+        self.instrumentation = instrumentation
+
+    def get_text_from_boxes(
+        self, split_boxes: List[Dict[str, Dict[str, float]]]
+    ) -> List[str]:
+        """Get the text of each box produced by split_bounding_box_by_lines.
+
+        The boxes must share their x-coordinates and be ordered from top to
+        bottom. A word close to a row boundary can fall inside both adjacent
+        boxes, in which case it is returned for both.
+        """
+        if not split_boxes:
+            return []
+
+        column_coordinates = {
+            "top_left": split_boxes[0]["top_left"],
+            "bottom_right": split_boxes[-1]["bottom_right"],
+        }
+        word_indexes = self.word_index.get_indexes_in_bounding_box(
+            column_coordinates, self.threshold, self.instrumentation
+        )
+
+        # Row r holds the words with lower[r] <= top and bottom <= upper[r]
+        lower = (
+            np.array([box["top_left"]["y"] for box in split_boxes], dtype=np.float64)
+            - self.threshold
+        )
+        upper = (
+            np.array(
+                [box["bottom_right"]["y"] for box in split_boxes], dtype=np.float64
+            )
+            + self.threshold
+        )
+        first_rows = np.searchsorted(
+            upper, self.word_index.bottom_right_y[word_indexes], side="left"
+        )
+        end_rows = np.searchsorted(
+            lower, self.word_index.top_left_y[word_indexes], side="right"
+        )
+
+        row_counts = np.maximum(end_rows - first_rows, 0)
+        cell_word_indexes = np.repeat(word_indexes, row_counts)
+        row_offsets = np.arange(len(cell_word_indexes)) - np.repeat(
+            np.cumsum(row_counts) - row_counts, row_counts
+        )
+        cell_rows = np.repeat(first_rows, row_counts) + row_offsets
+
+        order = np.lexsort((cell_word_indexes, cell_rows))
+        cell_rows = cell_rows[order]
+        cell_word_indexes = cell_word_indexes[order]
+
+        texts = self.word_index.texts
+        row_texts: List[List[str]] = [[] for _ in split_boxes]
+        for row, word_index in zip(cell_rows.tolist(), cell_word_indexes.tolist()):
+            row_texts[row].append(texts[word_index])
+
+        return [" ".join(row_text) for row_text in row_texts]
@@ -0,0 +1,180 @@
+import copy
+import hashlib
+import json
+import os
+import re
+import threading
+from collections import OrderedDict
+from functools import lru_cache
+from typing import Any, Dict, Iterator, List, Mapping, Pattern, Tuple, Union
+
+from jsonschema import validate
+
+SCHEMA_PATH = os.path.join(
+    os.path.dirname(__file__),
+    "schema",
+    "template_json_schema.json",
+)
+
+
+@lru_cache(maxsize=1)
+def load_template_schema() -> Dict[str, Any]:
+    """Load the template JSON schema once per process."""
+    if not os.path.exists(SCHEMA_PATH):
+        raise FileNotFoundError(f"Schema file not found: {SCHEMA_PATH}")
+
+    with open(SCHEMA_PATH) as schema_file:
+        return json.load(schema_file)
+
+
+class CompiledTemplate(Mapping[str, Any]):
+    """A validated template with rules indexed by id and regexes precompiled.
+
+    Behaves like the raw template dictionary, so it can be passed anywhere a
+    template is expected. Use `CompiledTemplate.compile` to reuse instances
+    across documents; they are cached by the hash of the template content.
+    """
+
+    max_cached_templates = 256
+    _cache: "OrderedDict[str, CompiledTemplate]" = OrderedDict()
+    # Templates are compiled from executor threads, e.g. by AsyncParser
+    _cache_lock = threading.Lock()
+
+    def __init__(self, template: Dict[str, Any]) -> None:
+        validate(instance=template, schema=load_template_schema())
+
+        # A copy, so the caller changing its dictionary cannot make a cached
+        # template stale
+        template = copy.deepcopy(template)
+        self.template = template
+        self.content_hash = self.get_content_hash(template)
+        self.extraction_method = template.get("extraction_method")
+
+        self.rules: Dict[str, Dict[str, Any]] = {}
+        for rule in template["rules"]:
+            # The first rule with a given id wins, matching get_rule_from_id
+            self.rules.setdefault(rule["rule_id"], rule)
+
+        self.regexes: Dict[str, Union[str, Pattern[str]]] = {}
+        for rule_id, rule in self.rules.items():
+            regex = rule["config"].get("regex")
+            if not regex:
+                continue
+            try:
+                self.regexes[rule_id] = re.compile(regex)
+            except re.error:
+                # Keep the raw pattern so the error is reported where it is used
+                self.regexes[rule_id] = regex
+
+        self._page_rules: Dict[int, List[Tuple[Dict[str, Any], List[int]]]] = {}
+
+    @classmethod
+    def compile(
+        cls, template: Union[Dict[str, Any], "CompiledTemplate"]
+    ) -> "CompiledTemplate":
+        """Return the compiled template for this content, validating it only once."""
+        if isinstance(template, CompiledTemplate):
+            return template
+
+        content_hash = cls.get_content_hash(template)
+        with cls._cache_lock:
+            compiled_template = cls._cache.get(content_hash)
+            if compiled_template is not None:
+                cls._cache.move_to_end(content_hash)
+                return compiled_template
+
+        # Validated outside the lock; two threads may both compile a new
+        # template, and the first one cached wins
+        compiled_template = cls(template)
+        with cls._cache_lock:
+            compiled_template = cls._cache.setdefault(content_hash, compiled_template)
+            cls._cache.move_to_end(content_hash)
+            if len(cls._cache) > cls.max_cached_templates:
+                cls._cache.popitem(last=False)
+        return compiled_template
+
+    @staticmethod
+    def get_content_hash(template: Dict[str, Any]) -> str:
+        serialized = json.dumps(template, sort_keys=True, separators=(",", ":"))
+        return hashlib.sha256(serialized.encode("utf-8")).hexdigest()
+
+    @staticmethod
+    def page_number_converter(page_numbers: str, number_of_pages: int) -> List[int]:
+        """Convert a page number expression such as "2:-1" into page indexes."""
+        if ":" in page_numbers:
+            left_index = int(page_numbers.split(":")[0])
+            right_index = int(page_numbers.split(":")[1])
+        else:
+            index = int(page_numbers)
+            if index >= 0:
+                index = index - 1
+            elif index < 0:
+                index = number_of_pages + index
+            return [index]
+
+        if left_index > 0:
+            left_index -= 1
+        if right_index > 0:
+            right_index -= 1
+
+        if left_index < 0:
+            left_index = number_of_pages + left_index + 1
+        if right_index < 0:
+            right_index = number_of_pages + right_index + 1
+
+        if left_index == right_index:
+            return [left_index]
+
+        return list(range(left_index, right_index))
+
+    @staticmethod
+    def resolve_page_index(page_index: int, number_of_pages: int) -> int:
+        """Turn a negative page index within the document into its page's index.
+
+        Rules read pages with Python indexing, so -1 is the last page. Out of
+        range indexes are left as they are for the rules to reject.
+        """
+        if -number_of_pages <= page_index < 0:
+            return page_index % number_of_pages
+        return page_index
+
+    def get_rule(self, rule_id: str) -> Dict[str, Any]:
+        if rule_id not in self.rules:
+            # Same exception as the linear lookup, which parse_pdf relies on
+            raise IndexError(f"Rule ID '{rule_id}' not found in template rules")
+        return self.rules[rule_id]
+
+    def get_regex(self, rule_id: str) -> Union[str, Pattern[str], None]:
+        return self.regexes.get(rule_id)
+
+    def get_page_rules(
+        self, number_of_pages: int
+    ) -> List[Tuple[Dict[str, Any], List[int]]]:
+        """Get each page rule with its page indexes resolved for a page count.
+
+        Negative indexes are resolved to the pages they refer to, so pages
+        can be walked in order, e.g. when they are streamed by iter_parse.
+        """
+        if number_of_pages not in self._page_rules:
+            self._page_rules[number_of_pages] = [
+                (
+                    page_rule,
+                    [
+                        self.resolve_page_index(page_index, number_of_pages)
+                        for page_index in self.page_number_converter(
+                            page_rule["page_numbers"], number_of_pages
+                        )
+                    ],
+                )
+                for page_rule in self.template["pages"]
+            ]
+        return self._page_rules[number_of_pages]
+
+    def __getitem__(self, key: str) -> Any:
+        return self.template[key]
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self.template)
+
+    def __len__(self) -> int:
+        return len(self.template)
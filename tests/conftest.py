@@ -0,0 +1,24 @@
+from typing import Any, Dict, Tuple
+
+import pytest
+
+from pdf_parser.extractors import DataExtractor
+
+
+@pytest.fixture(scope="session")
+def statement_pdf() -> bytes:
+    """A generated three-page bank statement with ruled table rows."""
+    pytest.importorskip("pymupdf")
+    from benchmarks.generator import generate_statement
+    from benchmarks.stubs import install_renderer_fallback
+
+    install_renderer_fallback()
+    return generate_statement(number_of_pages=3, rows_per_page=40)
+
+
+@pytest.fixture(scope="session")
+def statement_data(statement_pdf: bytes) -> Tuple[Dict[str, Any], Any]:
+    """The extracted pdf_data and page images of the statement."""
+    data_extractor = DataExtractor(statement_pdf)
+    pdf_data = data_extractor.extract_data()
+    return pdf_data, data_extractor.page_images
@@ -0,0 +1,98 @@
+import json
+from typing import Any, Dict, List, Tuple
+
+import pytest
+
+from pdf_parser.backends import ExtractionBackend, PdfplumberBackend, PyMuPDFBackend
+from pdf_parser.extractors import DataExtractor
+from pdf_parser.parser import Parser
+
+pytest.importorskip("pymupdf")
+
+TOLERANCE = 0.005
+MAX_PIXEL_DIFFERENCE = 8
+
+
+def get_box(item: Dict[str, Any]) -> Tuple[float, float, float, float]:
+    box = item.get("bounding_box", item)["decimal_coordinates"]
+    return (
+        box["top_left"]["x"],
+        box["top_left"]["y"],
+        box["bottom_right"]["x"],
+        box["bottom_right"]["y"],
+    )
+
+
+def assert_close(
+    box: Tuple[float, ...], other_box: Tuple[float, ...], tolerance: float
+) -> None:
+    assert all(
+        abs(value - other) <= tolerance for value, other in zip(box, other_box)
+    ), f"{other_box} is not within {tolerance} of {box}"
+
+
+def extract(
+    pdf_bytes: bytes, backend: ExtractionBackend
+) -> Tuple[Dict[str, Any], List[Any]]:
+    """Extract a PDF with a backend and parse it with both statement templates."""
+    from benchmarks.generator import get_statement_template
+
+    data_extractor = DataExtractor(pdf_bytes, backend=backend)
+    pdf_data = data_extractor.extract_data()
+    outputs = [
+        json.loads(
+            Parser.parse_pdf(
+                get_statement_template(row_delimiter_type),
+                pdf_data,
+                data_extractor.page_images,
+            )
+        )["pages"]
+        for row_delimiter_type in ("line", "field")
+    ]
+    return pdf_data, outputs
+
+
+@pytest.mark.parametrize("ruled", [True, False])
+def test_pymupdf_backend_matches_pdfplumber(statement_pdf: bytes, ruled: bool) -> None:
+    from benchmarks.generator import generate_statement
+
+    pdf_bytes = statement_pdf if ruled else generate_statement(3, ruled=False)
+    expected_data, expected_outputs = extract(pdf_bytes, PdfplumberBackend())
+    pdf_data, outputs = extract(pdf_bytes, PyMuPDFBackend())
+
+    assert pdf_data["number_of_pages"] == expected_data["number_of_pages"]
+    for dimension in ("width", "height"):
+        assert pdf_data["dimensions"][dimension] == pytest.approx(
+            expected_data["dimensions"][dimension], abs=1
+        )
+
+    for expected_page, page in zip(expected_data["pages"], pdf_data["pages"]):
+        assert [word["text"] for word in page["content"]] == [
+            word["text"] for word in expected_page["content"]
+        ]
+        for expected_word, word in zip(expected_page["content"], page["content"]):
+            assert_close(get_box(expected_word), get_box(word), TOLERANCE)
+
+        expected_lines = sorted(expected_page["lines"], key=get_box)
+        lines = sorted(page["lines"], key=get_box)
+        assert len(lines) == len(expected_lines)
+        for expected_line, line in zip(expected_lines, lines):
+            assert_close(get_box(expected_line), get_box(line), TOLERANCE)
+            assert_close(
+                expected_line["average_pixel_value"],
+                line["average_pixel_value"],
+                MAX_PIXEL_DIFFERENCE,
+            )
+
+    assert outputs == expected_outputs
+
+
+def test_incomplete_backend_cannot_be_created() -> None:
+    class WordsOnlyBackend(ExtractionBackend):
+        name = "words-only"
+
+        def get_words(self, page: Any) -> List[Dict[str, Any]]:
+            return []
+
+    with pytest.raises(TypeError):
+        WordsOnlyBackend()  # type: ignore[abstract]
@@ -0,0 +1,14 @@
+import pickle
+
+from pdf_parser.cache import OCRCache
+
+
+def test_ocr_cache_can_be_sent_to_a_worker_process() -> None:
+    ocr_cache = OCRCache()
+    ocr_cache.set("digest", (0, 0, 10, 10), "text")
+
+    copy = pickle.loads(pickle.dumps(ocr_cache))
+
+    assert copy.get("digest", (0, 0, 10, 10)) == "text"
+    copy.set("digest", (0, 0, 20, 20), "more text")
+    assert copy.get("digest", (0, 0, 20, 20)) == "more text"
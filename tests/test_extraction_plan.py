@@ -0,0 +1,54 @@
+import json
+from typing import Any, Dict, Tuple
+
+import pytest
+
+from pdf_parser.extraction_plan import ExtractionPlan
+from pdf_parser.extractors import DataExtractor
+from pdf_parser.parser import Parser
+
+
+def parse(template: Dict[str, Any], pdf_data: Dict[str, Any], page_images: Any) -> Any:
+    output = json.loads(Parser.parse_pdf(template, pdf_data, page_images))
+    del output["metadata"]["document_id"]
+    del output["metadata"]["parsed_at"]
+    return output
+
+
+# The statement has three pages
+@pytest.mark.parametrize(
+    "page_numbers", ["0", "1", "-1", "-3", "-5", "6", "2:-1", "1:-1"]
+)
+@pytest.mark.parametrize(
+    "row_delimiter", [("line", 100), ("line", 255), ("field", 100)]
+)
+def test_plan_limited_extraction_matches_full_extraction(
+    statement_pdf: bytes,
+    statement_data: Tuple[Dict[str, Any], Any],
+    page_numbers: str,
+    row_delimiter: Tuple[str, int],
+) -> None:
+    from benchmarks.generator import get_statement_template
+
+    row_delimiter_type, max_pixel_value = row_delimiter
+    template = get_statement_template(row_delimiter_type)
+    template["rules"][-1]["config"]["row_delimiter"][
+        "max_pixel_value"
+    ] = max_pixel_value
+    for page_rule in template["pages"]:
+        page_rule["page_numbers"] = page_numbers
+    pdf_data, page_images = statement_data
+
+    plan = ExtractionPlan.from_template(template)
+    data_extractor = DataExtractor(statement_pdf, plan=plan)
+    planned_data = data_extractor.extract_data()
+
+    assert plan.pixels == (row_delimiter_type == "line" and max_pixel_value < 255)
+    page_indexes = plan.get_page_indexes(pdf_data["number_of_pages"])
+    assert page_indexes is not None
+    for page_index, page in enumerate(planned_data["pages"]):
+        if page_index not in page_indexes:
+            assert not page["content"] and not page["lines"]
+    assert parse(template, planned_data, data_extractor.page_images) == parse(
+        template, pdf_data, page_images
+    )
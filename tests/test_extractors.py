@@ -0,0 +1,36 @@
+from typing import Any, Dict, List
+
+import pytest
+
+from pdf_parser.extractors import DataExtractor
+from pdf_parser.page_data import ColumnarPage
+
+
+def get_pages(pdf_data: Dict[str, Any]) -> List[Dict[str, Any]]:
+    return [
+        page.to_dict() if isinstance(page, ColumnarPage) else page
+        for page in pdf_data["pages"]
+    ]
+
+
+@pytest.mark.parametrize("columnar", [False, True])
+def test_parallel_extraction_matches_serial_extraction(
+    statement_pdf: bytes, columnar: bool, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    serial_data = DataExtractor(statement_pdf, columnar=columnar).extract_data()
+
+    parallel_calls = []
+    extract_pages_in_parallel = DataExtractor.extract_pages_in_parallel
+
+    def spy(data_extractor: DataExtractor, number_of_pages: int) -> List[Any]:
+        parallel_calls.append(number_of_pages)
+        return extract_pages_in_parallel(data_extractor, number_of_pages)
+
+    monkeypatch.setattr(DataExtractor, "extract_pages_in_parallel", spy)
+    parallel_data = DataExtractor(
+        statement_pdf, columnar=columnar, max_workers=2, parallel_page_threshold=1
+    ).extract_data()
+
+    assert parallel_calls == [serial_data["number_of_pages"]]
+    assert get_pages(parallel_data) == get_pages(serial_data)
+    assert parallel_data["dimensions"] == serial_data["dimensions"]
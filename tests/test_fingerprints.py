@@ -0,0 +1,65 @@
+from typing import Any, Dict, List
+
+from pdf_parser.fingerprints import FingerprintIndex
+
+
+def make_template(name: str, anchors: List[Dict[str, Any]]) -> Dict[str, Any]:
+    return {
+        "metadata": {"template_name": name, "version": "1"},
+        "fingerprint": {"anchors": anchors},
+    }
+
+
+def make_pdf_data(words: List[Dict[str, Any]]) -> Dict[str, Any]:
+    return {
+        "pages": [
+            {
+                "content": [
+                    {
+                        "text": word["text"],
+                        "bounding_box": {
+                            "decimal_coordinates": {
+                                "top_left": {"x": word["x"], "y": word["y"]}
+                            }
+                        },
+                    }
+                    for word in words
+                ]
+            }
+        ]
+    }
+
+
+BANK = {"text": "Bank", "x": 0.1, "y": 0.1}
+STATEMENT = {"text": "Statement", "x": 0.5, "y": 0.1}
+INVOICE = {"text": "Invoice", "x": 0.5, "y": 0.1}
+DASHES = {"text": "---", "x": 0.1, "y": 0.2}
+
+
+def test_add_templates_matches_adding_one_at_a_time() -> None:
+    templates = [
+        make_template("statement", [BANK, STATEMENT]),
+        make_template("invoice", [BANK, INVOICE]),
+    ]
+    one_at_a_time = FingerprintIndex()
+    for template in templates:
+        one_at_a_time.add_template(template)
+    bulk = FingerprintIndex()
+    bulk.add_templates(templates)
+
+    assert bulk.weights == one_at_a_time.weights
+    pdf_data = make_pdf_data([BANK, STATEMENT])
+    assert bulk.match(pdf_data) == one_at_a_time.match(pdf_data)
+    assert bulk.match(pdf_data)[0] == ("statement:1", 1.0)
+
+
+def test_punctuation_only_anchors_are_skipped() -> None:
+    index = FingerprintIndex()
+    index.add_templates([make_template("statement", [BANK, STATEMENT, DASHES])])
+
+    assert "" not in index.postings
+    # A punctuation-only word in the document doesn't match anything either
+    assert index.match(make_pdf_data([DASHES])) == []
+    assert index.match(make_pdf_data([BANK, STATEMENT, DASHES])) == [
+        ("statement:1", 1.0)
+    ]
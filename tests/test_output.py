@@ -0,0 +1,91 @@
+import io
+import re
+from typing import Any, Dict, Tuple
+
+import pytest
+
+from pdf_parser.output import OutputWriter
+from pdf_parser.parser import Parser
+from pdf_parser.pydantic_models import Document
+
+
+def get_template(row_delimiter_type: str) -> Dict[str, Any]:
+    from benchmarks.generator import get_statement_template
+
+    return get_statement_template(row_delimiter_type)
+
+
+def without_run_metadata(output_json: str) -> str:
+    """Blank the document ID and timestamp, which differ between parses."""
+    output_json = re.sub(r'"document_id":"[^"]*"', '"document_id":""', output_json)
+    return re.sub(r'"parsed_at":"[^"]*"', '"parsed_at":""', output_json)
+
+
+def serialize_with_pydantic(output: Dict[str, Any]) -> str:
+    output_document = Document(**output)
+    if output_document.metadata.metrics is None:
+        return output_document.model_dump_json(exclude={"metadata": {"metrics"}})
+    return output_document.model_dump_json()
+
+
+def test_edge_case_values_match_pydantic() -> None:
+    output = {
+        "metadata": {
+            "document_id": "id",
+            "parsed_at": "2024-03-01T00:00:00.000000Z",
+            "number_of_pages": 2,
+            "metrics": {
+                "timings": {"small": 5e-06, "large": 1e20, "nan": float("nan")},
+                "counters": {"words": 3},
+            },
+        },
+        "pages": [
+            {
+                "forms": [{"name": 'Café "Ltd" \\ \x01  '}, {"empty": ""}],
+                "tables": [{"data": []}, {"data": [{"a": "1", "b": "£2"}]}],
+            }
+        ],
+    }
+
+    assert OutputWriter.to_json(output) == serialize_with_pydantic(output)
+
+
+@pytest.mark.parametrize("row_delimiter_type", ["line", "field"])
+@pytest.mark.parametrize("rows_per_chunk", [OutputWriter.rows_per_chunk, 7])
+def test_direct_output_matches_pydantic_output(
+    statement_data: Tuple[Dict[str, Any], Any],
+    row_delimiter_type: str,
+    rows_per_chunk: int,
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    monkeypatch.setattr(OutputWriter, "rows_per_chunk", rows_per_chunk)
+    pdf_data, page_images = statement_data
+    template = get_template(row_delimiter_type)
+
+    expected = Parser.parse_pdf(template, pdf_data, page_images)
+    direct_output = Parser.parse_pdf(
+        template, pdf_data, page_images, output_mode="direct"
+    )
+    validated_output = Parser.parse_pdf(
+        template, pdf_data, page_images, output_mode="direct", validate_output=True
+    )
+
+    assert '"data":[{' in expected
+    assert without_run_metadata(direct_output) == without_run_metadata(expected)
+    assert without_run_metadata(validated_output) == without_run_metadata(expected)
+
+
+@pytest.mark.parametrize("row_delimiter_type", ["line", "field"])
+def test_parse_pdf_to_file_matches_parse_pdf(
+    statement_data: Tuple[Dict[str, Any], Any], row_delimiter_type: str
+) -> None:
+    pdf_data, page_images = statement_data
+    template = get_template(row_delimiter_type)
+
+    output_file = io.StringIO()
+    Parser.parse_pdf_to_file(template, pdf_data, page_images, output_file)
+
+    expected = Parser.parse_pdf(template, pdf_data, page_images)
+    assert without_run_metadata(output_file.getvalue()) == without_run_metadata(
+        expected
+    )
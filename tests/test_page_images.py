@@ -0,0 +1,16 @@
+import pickle
+
+from pdf_parser.extractors import DataExtractor
+
+
+def test_pinned_pages_are_not_rendered_again_after_pickling(
+    statement_pdf: bytes,
+) -> None:
+    page_images = DataExtractor(statement_pdf).get_page_images()
+    page_images.pin_pages()
+    rendered_pages = page_images.rendered_pages
+
+    copy = pickle.loads(pickle.dumps(page_images))
+
+    assert [copy[index] for index in range(len(copy))] == list(page_images)
+    assert copy.rendered_pages == rendered_pages == len(page_images)
@@ -0,0 +1,23 @@
+from typing import Any, Dict, Tuple
+
+from pdf_parser.parser import Parser
+from pdf_parser.templates import CompiledTemplate
+
+
+def test_ocr_executor_is_not_started_for_extraction_templates(
+    statement_data: Tuple[Dict[str, Any], Any]
+) -> None:
+    from benchmarks.generator import get_statement_template
+
+    pdf_data, page_images = statement_data
+    with Parser.open(ocr_workers=4) as parser:
+        parser.parse_template(
+            CompiledTemplate.compile(get_statement_template()), pdf_data, page_images
+        )
+        assert parser.ocr_executor is None
+        assert parser.text_extractor.ocr_executor is None
+
+        ocr_executor = parser.get_ocr_executor()
+        assert ocr_executor is not None
+        assert parser.get_ocr_executor() is ocr_executor
+        assert parser.text_extractor.ocr_executor is ocr_executor
@@ -0,0 +1,145 @@
+import random
+from typing import Any, Dict, List
+
+import pytest
+
+from pdf_parser.coordinate_utils import WordIndex
+from pdf_parser.page_data import PageWords
+from pdf_parser.tables import TableCellAssigner, TableSplitter
+
+THRESHOLD = 0.005
+
+
+def make_word(
+    text: str, x0: float, top: float, x1: float, bottom: float
+) -> Dict[str, Any]:
+    decimal_coordinates = {
+        "top_left": {"x": x0, "y": top},
+        "bottom_right": {"x": x1, "y": bottom},
+    }
+    # On a 1000 by 1000 point page
+    coordinates = {
+        corner: {axis: value * 1000 for axis, value in point.items()}
+        for corner, point in decimal_coordinates.items()
+    }
+    return {
+        "text": text,
+        "bounding_box": {
+            "coordinates": coordinates,
+            "decimal_coordinates": decimal_coordinates,
+        },
+    }
+
+
+def get_texts_per_cell(
+    word_index: WordIndex, split_boxes: List[Dict[str, Dict[str, float]]]
+) -> List[str]:
+    """The per-cell loop the vectorized assignment replaces."""
+    return [
+        " ".join(
+            word_index.texts[index]
+            for index in word_index.get_indexes_in_bounding_box(box, THRESHOLD)
+        )
+        for box in split_boxes
+    ]
+
+
+COLUMN = {"top_left": {"x": 0.2, "y": 0.2}, "bottom_right": {"x": 0.4, "y": 0.5}}
+ROW_LINES = [0.3, 0.4]
+
+WORDS = [
+    make_word("first", 0.21, 0.21, 0.3, 0.23),
+    make_word("second", 0.21, 0.31, 0.3, 0.33),
+    make_word("third", 0.25, 0.45, 0.35, 0.47),
+    # Within the threshold of the boundary at 0.3, so inside both rows
+    make_word("straddling", 0.22, 0.297, 0.3, 0.303),
+    # Ends exactly on the boundary at 0.4
+    make_word("touching", 0.3, 0.38, 0.38, 0.4),
+    # Outside every cell: left of, right of, above and below the column
+    make_word("left", 0.05, 0.21, 0.15, 0.23),
+    make_word("right", 0.45, 0.31, 0.55, 0.33),
+    make_word("above", 0.25, 0.1, 0.3, 0.12),
+    make_word("below", 0.25, 0.6, 0.3, 0.62),
+    # Wider than the column
+    make_word("wide", 0.1, 0.41, 0.5, 0.43),
+]
+
+
+@pytest.mark.parametrize("columnar", [False, True])
+def test_vectorized_assignment_matches_per_cell_loop(columnar: bool) -> None:
+    words = PageWords.from_items(WORDS) if columnar else WORDS
+    word_index = WordIndex(words)
+    split_boxes = TableSplitter({}).split_bounding_box_by_lines(COLUMN, ROW_LINES)
+
+    texts = TableCellAssigner(word_index, THRESHOLD).get_text_from_boxes(split_boxes)
+
+    assert texts == get_texts_per_cell(word_index, split_boxes)
+    assert texts == ["first straddling", "second straddling touching", "third"]
+
+
+def test_vectorized_assignment_matches_per_cell_loop_on_random_pages() -> None:
+    generator = random.Random(0)
+    for _ in range(50):
+        words = []
+        for word_number in range(generator.randint(0, 80)):
+            x0 = generator.uniform(0, 0.9)
+            top = generator.uniform(0, 0.95)
+            words.append(
+                make_word(
+                    f"w{word_number}",
+                    x0,
+                    top,
+                    x0 + generator.uniform(0.01, 0.1),
+                    top + generator.uniform(0, 0.03),
+                )
+            )
+        word_index = WordIndex(words)
+        row_lines = sorted(
+            generator.uniform(0.1, 0.9) for _ in range(generator.randint(0, 20))
+        )
+        column = {
+            "top_left": {"x": generator.uniform(0, 0.5), "y": 0.05},
+            "bottom_right": {"x": generator.uniform(0.5, 1), "y": 0.95},
+        }
+        split_boxes = TableSplitter({}).split_bounding_box_by_lines(column, row_lines)
+
+        assert TableCellAssigner(word_index, THRESHOLD).get_text_from_boxes(
+            split_boxes
+        ) == get_texts_per_cell(word_index, split_boxes)
+
+
+def test_empty_column_has_no_cells() -> None:
+    word_index = WordIndex(WORDS)
+    assert TableCellAssigner(word_index, THRESHOLD).get_text_from_boxes([]) == []
+
+
+def test_average_y_coordinates_does_not_chain_rows() -> None:
+    # 0.116 is within the tolerance of 0.108 but not of the row's first value
+    assert TableSplitter({}).average_y_coordinates(
+        [0.1, 0.108, 0.116], 0.01
+    ) == pytest.approx([0.104, 0.116])
+
+
+def test_average_y_coordinates_tolerance_is_exclusive() -> None:
+    table_splitter = TableSplitter({})
+    # Exactly representable values, so the difference is exactly the tolerance
+    assert table_splitter.average_y_coordinates([0.5, 0.625], 0.125) == [0.5, 0.625]
+    assert table_splitter.average_y_coordinates([0.5, 0.62], 0.125) == pytest.approx(
+        [0.56]
+    )
+
+
+def test_average_y_coordinates_merges_every_close_value() -> None:
+    # Removing 0.105 while iterating made the previous implementation skip
+    # 0.108 and leave it as a row of its own
+    assert TableSplitter({}).average_y_coordinates(
+        [0.1, 0.105, 0.108], 0.01
+    ) == pytest.approx([(0.1 + 0.105 + 0.108) / 3])
+
+
+def test_average_y_coordinates_sorts_its_input() -> None:
+    table_splitter = TableSplitter({})
+    assert table_splitter.average_y_coordinates([], 0.01) == []
+    assert table_splitter.average_y_coordinates(
+        [0.3, 0.1, 0.305, 0.2], 0.01
+    ) == pytest.approx([0.1, 0.2, 0.3025])
@@ -0,0 +1,21 @@
+import pytest
+
+from pdf_parser.templates import CompiledTemplate
+
+
+def test_changing_a_compiled_template_dict_does_not_change_the_cached_template() -> (
+    None
+):
+    pytest.importorskip("pymupdf")
+    from benchmarks.generator import get_statement_template
+
+    template = get_statement_template()
+    compiled_template = CompiledTemplate.compile(template)
+    template["rules"][0]["rule_id"] = "changed"
+
+    assert "changed" not in compiled_template.rules
+    assert compiled_template.content_hash == CompiledTemplate.get_content_hash(
+        compiled_template.template
+    )
+    assert CompiledTemplate.compile(template) is not compiled_template
+    assert "changed" in CompiledTemplate.compile(template).rules